@@ -19,7 +19,6 @@
 # ----------------------------------------------------------------------
 
 from measure import _version
-from measure.controller import MainController
 
 # Version number based on git tags
 __version__ = _version.get_versions()["version"]
@@ -28,5 +27,14 @@ __version__ = _version.get_versions()["version"]
 if __version__ == "0+unknown":
     __version__ = "0.1.5"
 
-# Application controller
-app = MainController()
+
+def __getattr__(name: str):
+    """Creates the application controller on first use, tools import the package too."""
+    if name == "app":
+        from measure.controller import MainController
+
+        global app
+        app = MainController()
+        return app
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+"""Reports the latency percentiles per instrument command of an event log.
+
+Usage: python -m measure.analyze_events ~/.u-measure/events/events_<timestamp>.jsonl
+"""
+
+import argparse
+import json
+from typing import Optional
+
+from measure.model import EventLogModel
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m measure.analyze_events", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("path", help="JSON-lines event log written by U-Measure")
+    parser.add_argument(
+        "--json", action="store_true", help="print the report as JSON instead"
+    )
+    arguments = parser.parse_args(argv)
+
+    report = EventLogModel.analyze(path=arguments.path)
+    if arguments.json:
+        print(json.dumps(report, indent=2))
+        return None
+
+    print(
+        f"{'command':<60} {'count':>7} {'total ms':>10} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+    )
+    for command, values in report.items():
+        print(
+            f"{command[:60]:<60} {values['count']:>7.0f} {values['total']:>10.1f} "
+            f"{values['p50']:>8.2f} {values['p90']:>8.2f} {values['p99']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
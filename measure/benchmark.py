@@ -0,0 +1,260 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+"""Benchmarks full collections against the simulated MSO and AFG.
+
+Usage: python -m measure.benchmark [--frequencies 20,30,40,50,60] [--repetitions 1 5]
+       [--profiles lan congested] [--output results.json]
+
+Every combination of frequency list, repetition count and latency profile runs one
+collection. The JSON report holds the wall time per step, the SCPI round-trips per
+step and the idle time of each instrument, compare reports between commits.
+"""
+
+import argparse
+import itertools
+import json
+import numpy
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+from qtpy.QtCore import QCoreApplication, QSettings
+
+import measure
+from measure.controller import VisaController
+from measure.model import (
+    CancellationModel,
+    EventLogModel,
+    ExperimentModel,
+    ExperimentSnapshotModel,
+    JournalModel,
+    SetupModel,
+    SweepPlanModel,
+)
+from measure.simulator import (
+    AfgSimulator,
+    MsoSimulator,
+    ScpiServer,
+    SimulatorConfigModel,
+)
+
+# Simulator settings of each latency profile
+PROFILES: dict[str, dict[str, Any]] = {
+    "ideal": {"latency": 0.0, "acquisition_time": 0.01, "save_time": 0.05},
+    "lan": {"latency": 0.001, "acquisition_time": 0.05, "save_time": 0.2},
+    "congested": {
+        "latency": 0.005,
+        "command_latency": {"*idn": 0.05, "curve": 0.1},
+        "acquisition_time": 0.05,
+        "save_time": 0.4,
+    },
+}
+
+
+def run_case(
+    frequencies: list[float],
+    repetitions: int,
+    profile: str,
+    storage: str,
+    acquisition: str,
+    directory: str,
+) -> dict[str, Any]:
+    """Runs one collection against freshly started simulators and reports it."""
+    config = SimulatorConfigModel(**PROFILES[profile])
+    afg = AfgSimulator(config=config)
+    mso = MsoSimulator(config=config, afg=afg)
+    servers = {
+        "MSO": ScpiServer(simulator=mso, host="127.0.0.1", port=0),
+        "AFG": ScpiServer(simulator=afg, host="127.0.0.1", port=0),
+    }
+    for server in servers.values():
+        server.start()
+
+    settings = QSettings(
+        Path(directory, "settings.ini").as_posix(), QSettings.Format.IniFormat
+    )
+    setup_model = SetupModel(settings=settings)
+    setup_model.mso = servers["MSO"].resource_name
+    setup_model.afg = servers["AFG"].resource_name
+    setup_model.run_number = "benchmark"
+    setup_model.vpp = 2.0
+
+    experiment_model = ExperimentModel(settings=settings)
+    experiment_model.frequencies = list(frequencies)
+    experiment_model.threshold = 27.0
+    experiment_model.repetitions = repetitions
+    experiment_model.file_number = 1
+    experiment_model.scan = "A"
+    experiment_model.storage = storage
+    experiment_model.acquisition = acquisition
+
+    basedir = Path(directory, "data").as_posix() + "/"
+    Path(basedir).mkdir(parents=True, exist_ok=True)
+    event_log = EventLogModel.create(directory=directory)
+    visa_controller = VisaController(event_log=event_log)
+
+    try:
+        snapshot = ExperimentSnapshotModel.capture(
+            setup_model=setup_model, experiment_model=experiment_model, basedir=basedir
+        )
+        visa_controller.connect(snapshot=snapshot)
+        if not visa_controller.connected:
+            raise RuntimeError("The simulated instruments could not be connected.")
+        journal = JournalModel.create(
+            directory=directory, parameters=snapshot.run_parameters()
+        )
+
+        start = time.monotonic()
+        visa_controller.collect_data(
+            cancellation=CancellationModel(),
+            journal=journal,
+            snapshot=snapshot,
+            plan=SweepPlanModel.compile(snapshot=snapshot),
+        )
+        wall_time = time.monotonic() - start
+    finally:
+        visa_controller.close()
+        event_log.close()
+        for server in servers.values():
+            server.stop()
+
+    report = _analyze(path=event_log.path, start=start, wall_time=wall_time)
+    return {
+        "frequencies": list(frequencies),
+        "repetitions": repetitions,
+        "profile": profile,
+        "storage": storage,
+        "acquisition": acquisition,
+        "wall_time": wall_time,
+        **report,
+    }
+
+
+def _analyze(path: str, start: float, wall_time: float) -> dict[str, Any]:
+    """Summarizes the event log entries written during the collection."""
+    steps: list[dict[str, Any]] = []
+    calls: dict[str, list[dict[str, Any]]] = {"MSO": [], "AFG": []}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            entry = json.loads(line)
+            if entry["t"] < start:
+                continue
+            if entry["event"] == "step":
+                steps.append(entry)
+            elif entry["event"] == "scpi":
+                calls.setdefault(entry["instrument"], []).append(entry)
+
+    # Wall time of a step runs from the end of the previous one
+    step_ends = numpy.array([step["t"] for step in steps])
+    step_times = numpy.diff(numpy.concatenate(([start], step_ends)))
+    count = max(len(steps), 1)
+
+    def summary(values: numpy.ndarray) -> dict[str, float]:
+        if values.size == 0:
+            return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "max": 0.0}
+        return {
+            "mean": float(values.mean()),
+            "p50": float(numpy.percentile(values, 50.0)),
+            "p90": float(numpy.percentile(values, 90.0)),
+            "max": float(values.max()),
+        }
+
+    return {
+        "steps": len(steps),
+        "step_time": summary(step_times),
+        "step_time_per_frequency": {
+            str(frequency): float(
+                numpy.mean(
+                    [
+                        time
+                        for time, step in zip(step_times, steps)
+                        if step["frequency"] == frequency
+                    ]
+                )
+            )
+            for frequency in sorted({step["frequency"] for step in steps})
+        },
+        "stages": {
+            stage: summary(numpy.array([step[stage] for step in steps]))
+            for stage in ("configure", "arm", "acquire", "save", "settle")
+        },
+        "instruments": {
+            name: {
+                "round_trips_per_step": len(entries) / count,
+                "busy_time": sum(entry["duration"] for entry in entries),
+                "idle_time": wall_time - sum(entry["duration"] for entry in entries),
+            }
+            for name, entries in calls.items()
+        },
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m measure.benchmark", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument(
+        "--frequencies",
+        nargs="+",
+        default=["20,30,40,50,60"],
+        help="comma separated frequency lists in MHz, one case per list",
+    )
+    parser.add_argument("--repetitions", nargs="+", type=int, default=[1])
+    parser.add_argument(
+        "--profiles", nargs="+", choices=sorted(PROFILES), default=["lan"]
+    )
+    parser.add_argument("--storage", choices=("scope", "csv", "hdf5"), default="scope")
+    parser.add_argument(
+        "--acquisition",
+        choices=("standard", "fastframe", "average"),
+        default="standard",
+    )
+    parser.add_argument("--output", help="JSON file, printed when not given")
+    arguments = parser.parse_args(argv)
+
+    application = QCoreApplication.instance() or QCoreApplication([])
+
+    cases = []
+    for frequencies, repetitions, profile in itertools.product(
+        arguments.frequencies, arguments.repetitions, arguments.profiles
+    ):
+        with tempfile.TemporaryDirectory(prefix="u-measure-benchmark-") as directory:
+            cases.append(
+                run_case(
+                    frequencies=[float(value) for value in frequencies.split(",")],
+                    repetitions=repetitions,
+                    profile=profile,
+                    storage=arguments.storage,
+                    acquisition=arguments.acquisition,
+                    directory=directory,
+                )
+            )
+        application.processEvents()
+
+    results = json.dumps({"version": measure.__version__, "cases": cases}, indent=2)
+    if arguments.output:
+        Path(arguments.output).write_text(results + "\n", encoding="utf-8")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,15 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+from measure.controller.settings_controller import SettingsController
 from measure.controller.setup_controller import SetupController
 from measure.controller.experiment_controller import ExperimentController
+from measure.controller.session_controller import ConnectionFailed, SessionController
+from measure.controller.writer_controller import WriterController
+from measure.controller.metrics_controller import MetricsController
 from measure.controller.visa_controller import VisaController
+from measure.controller.scheduler_controller import (
+    SchedulerCommand,
+    SchedulerController,
+)
 from measure.controller.main_controller import MainController
@@ -52,6 +52,12 @@ class ExperimentController:
         self._widget.spin_temperature.valueChanged.connect(
             self._spin_temperature_value_changed
         )
+        self._widget.combo_storage.currentIndexChanged.connect(
+            self._combo_storage_index_changed
+        )
+        self._widget.combo_acquisition.currentIndexChanged.connect(
+            self._combo_acquisition_index_changed
+        )
 
     def _update_experiment_values(self) -> None:
         """Update the experiment GUI values."""
@@ -62,6 +68,13 @@ class ExperimentController:
         self._widget.txt_threshold.setText(str(self.model.threshold))
         self._widget.txt_reset.setText(str(self.model.reset_frequency))
         self._widget.txt_scan.setText(self.model.scan)
+        self._widget.combo_storage.setCurrentIndex(
+            max(self._widget.combo_storage.findData(self.model.storage), 0)
+        )
+        self._widget.combo_acquisition.setCurrentIndex(
+            max(self._widget.combo_acquisition.findData(self.model.acquisition), 0)
+        )
+        self._update_repetitions_label()
 
         # Update frequencies text
         frequencies_str = ""
@@ -122,3 +135,19 @@ class ExperimentController:
     def _spin_temperature_value_changed(self) -> None:
         """Updates the current temperature value based on user input."""
         self.model.temperature = self._widget.spin_temperature.value()
+
+    def _combo_storage_index_changed(self) -> None:
+        """Updates the current storage mode based on user input."""
+        self.model.storage = self._widget.combo_storage.currentData()
+
+    def _combo_acquisition_index_changed(self) -> None:
+        """Updates the current acquisition mode based on user input."""
+        self.model.acquisition = self._widget.combo_acquisition.currentData()
+        self._update_repetitions_label()
+
+    def _update_repetitions_label(self) -> None:
+        """Names the repetitions spin box after its use in the current acquisition mode."""
+        if self.model.acquisition == "average":
+            self._widget.set_repetitions_label("Averages")
+        else:
+            self._widget.set_repetitions_label("Repetitions")
@@ -19,15 +19,39 @@
 # ----------------------------------------------------------------------
 
 import datetime
+import logging
 import sys
+from collections import deque
+from contextlib import nullcontext
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import ContextManager, Optional
 
 from qtpy.QtWidgets import QApplication, QMessageBox
-from qtpy.QtCore import QSettings, QObject, Signal, QTimer
+from qtpy.QtCore import QObject, Signal, QTimer
 
 from measure.widget import MainWidget
 from measure.widget.custom import MsgBox
-from measure.model import PathModel, QtWorkerModel
-from measure.controller import SetupController, ExperimentController, VisaController
+from measure.model import (
+    EventLogModel,
+    PathModel,
+    ExperimentSnapshotModel,
+    Hdf5StorageModel,
+    JournalModel,
+    MetricsModel,
+    SweepPlanModel,
+    TimingModel,
+    TracerModel,
+)
+from measure.controller import (
+    SettingsController,
+    SetupController,
+    ExperimentController,
+    VisaController,
+    MetricsController,
+    SchedulerCommand,
+    SchedulerController,
+)
 
 
 class MainController(QObject):
@@ -37,10 +61,20 @@ class MainController(QObject):
     abort_triggered: Signal = Signal()
     finished: Signal = Signal()
 
+    # Feedback lines kept in the widget, the full history goes to the log file
+    feedback_lines: int = 2000
+    feedback_interval: int = 100
+    log_size: int = 5 * 1024 * 1024
+    log_backups: int = 5
+
+    # Steps in the rolling stage averages, a stage is slow above slow_factor times it
+    stage_window: int = 20
+    slow_factor: float = 1.5
+
     def __init__(self) -> None:
         super(MainController, self).__init__()
         self._app = QApplication(sys.argv)
-        self._settings = QSettings("GSECARS", "U-Measure")
+        self._settings = SettingsController("GSECARS", "U-Measure")
         self._model = PathModel()
         self._widget = MainWidget(settings=self._settings, model=self._model)
 
@@ -54,25 +88,55 @@ class MainController(QObject):
             widget=self._widget.group_widget.experiment, settings=self._settings
         )
 
+        # Event log of every instrument call, analyzed with measure.analyze_events
+        self._event_log = self._create_event_log()
+
+        # Chrome trace of each collection run, only recorded with --trace
+        self._tracer = (
+            TracerModel(directory=Path(Path.home(), ".u-measure", "traces").as_posix())
+            if "--trace" in sys.argv
+            else None
+        )
+
+        # Metrics of unattended runs, only served to Prometheus with --metrics
+        self._metrics = MetricsModel() if "--metrics" in sys.argv else None
+        self._metrics_server: Optional[MetricsController] = None
+
         # Visa controller
         self._visa_controller = VisaController(
-            setup_model=self._setup_controller.model,
-            experiment_model=self._experiment_controller.model,
-            basedir=self._setup_controller.basedir,
-            base_dir_changed=self._setup_controller.base_dir_changed,
+            event_log=self._event_log,
+            tracer=self._tracer,
+            metrics=self._metrics,
         )
 
+        # Timing model, learns the stage durations from the last runs
+        self._timing_model = TimingModel(settings=self._settings)
+
         # Helpers
-        self._collecting = False
-        self._aborting = False
+        self._journal_directory = Path(Path.home(), ".u-measure", "journals").as_posix()
+        self._log_directory = Path(Path.home(), ".u-measure", "logs").as_posix()
         self._input_check_passed = True
+        self._debug = "--debug" in sys.argv
         self._start_time = None
+        self._remaining_acquisitions = 0
+        self._completed_acquisitions = 0
+        self._stage_history: deque[dict[str, float]] = deque(maxlen=self.stage_window)
 
         # Thread and timer
         self._main_timer = QTimer()
         self._main_timer.setInterval(30)
-        self._main_worker = QtWorkerModel(self._worker_process, ())
-        self._main_worker.start()
+        self._scheduler = SchedulerController(visa_controller=self._visa_controller)
+        self._scheduler.start()
+        self._health_timer = QTimer()
+        self._health_timer.setInterval(10000)
+        self._health_timer.start()
+        self._feedback_timer = QTimer()
+        self._feedback_timer.setSingleShot(True)
+        self._feedback_timer.setInterval(self.feedback_interval)
+
+        # Feedback messages waiting for the next flush
+        self._feedback: deque[str] = deque(maxlen=self.feedback_lines)
+        self._feedback_log = self._create_feedback_log()
 
         # Run methods
         self._configure_widgets()
@@ -83,22 +147,57 @@ class MainController(QObject):
         # Set initial focus
         self._widget.group_widget.setup.lbl_path.setFocus()
 
+        # Keep the feedback pane bounded, old lines are dropped
+        self._widget.group_widget.control_status.txt_feedback.setMaximumBlockCount(
+            self.feedback_lines
+        )
+
+        # Offer to resume a run that was interrupted in an earlier session
+        self._update_resume_button()
+
+        self._start_metrics_server()
+
     def _connect_widgets(self) -> None:
         """Connects signals and slots for some, of the available, widgets."""
         self._visa_controller.new_feedback_message.connect(
             self._visa_controller_message
         )
+        self._scheduler.new_feedback_message.connect(self._visa_controller_message)
         self._visa_controller.current_repetition.connect(
             self._change_current_repetition
         )
+        self._visa_controller.connection_state.connect(
+            self._widget.group_widget.control_status.set_connection_state
+        )
+        self._visa_controller.writer_status.connect(
+            self._widget.group_widget.control_status.set_writer_status
+        )
+        self._visa_controller.plan_compiled.connect(self._plan_compiled)
+        self._visa_controller.step_timing.connect(self._step_timing)
+        self._health_timer.timeout.connect(self._health_timer_ticks)
+        self._feedback_timer.timeout.connect(self._flush_feedback)
 
         self._main_timer.timeout.connect(self._timer_ticks)
         self._widget.group_widget.control_status.btn_collection.clicked.connect(
             self._btn_collection_clicked
         )
+        self._widget.group_widget.control_status.btn_resume.clicked.connect(
+            self._btn_resume_clicked
+        )
         self.collect_triggered.connect(self._change_to_collecting)
         self.abort_triggered.connect(self._change_to_aborting)
         self.finished.connect(self._change_to_idle)
+        self._scheduler.collection_finished.connect(self.finished)
+        self._app.aboutToQuit.connect(self._scheduler.shutdown)
+        self._app.aboutToQuit.connect(self._settings.sync)
+        self._app.aboutToQuit.connect(self._close_event_log)
+        self._app.aboutToQuit.connect(self._stop_metrics_server)
+
+        # Debug overlay with the settings storage writes
+        if self._debug:
+            self._settings.writes_changed.connect(
+                self._widget.group_widget.control_status.set_settings_status
+            )
 
     def disable_widgets(self) -> None:
         """Disables setup and experiment widgets."""
@@ -110,12 +209,77 @@ class MainController(QObject):
         self._widget.group_widget.setup.enable()
         self._widget.group_widget.experiment.enable()
 
+    def _span(self, name: str) -> ContextManager[None]:
+        """Returns a trace span of a gui slot, a no-op without a tracer."""
+        if self._tracer is None:
+            return nullcontext()
+        return self._tracer.span(name=name, category="gui")
+
     def _timer_ticks(self) -> None:
         """Timer tick timeout method."""
+        with self._span("_timer_ticks"):
+            self._update_progress()
+
+    def _update_progress(self) -> None:
+        """Shows the elapsed time, the remaining time and the throughput."""
         elapsed_time = datetime.datetime.now() - self._start_time
         current_delta = datetime.timedelta(seconds=elapsed_time.seconds)
         self._widget.group_widget.control_status.lbl_time.setText(str(current_delta))
 
+        minutes = elapsed_time.total_seconds() / 60.0
+        self._widget.group_widget.control_status.set_progress(
+            eta=self._timing_model.estimate(
+                acquisition=self._experiment_controller.model.acquisition,
+                acquisitions=self._remaining_acquisitions,
+            ),
+            throughput=self._completed_acquisitions / minutes if minutes > 0 else 0.0,
+        )
+
+    def _plan_compiled(self, remaining: int) -> None:
+        """Resets the progress once the collection compiled its sweep plan."""
+        if self._tracer is not None:
+            self._tracer.instant("plan_compiled received", category="gui")
+        self._remaining_acquisitions = remaining
+        self._completed_acquisitions = 0
+        self._stage_history.clear()
+
+    def _step_timing(self, durations: dict[str, float]) -> None:
+        """Learns the stage durations of each completed acquisition."""
+        with self._span("_step_timing"):
+            self._update_stage_timing(durations=durations)
+
+    def _update_stage_timing(self, durations: dict[str, float]) -> None:
+        """Updates the timing model, the progress and the stage breakdown."""
+        self._timing_model.update(
+            acquisition=self._experiment_controller.model.acquisition,
+            durations=durations,
+        )
+        self._remaining_acquisitions = max(self._remaining_acquisitions - 1, 0)
+        self._completed_acquisitions += 1
+
+        self._stage_history.append(durations)
+        averages = {
+            stage: sum(step[stage] for step in self._stage_history)
+            / len(self._stage_history)
+            for stage in durations
+        }
+        # Short stages jitter too much to be flagged
+        slow = {
+            stage
+            for stage, duration in durations.items()
+            if len(self._stage_history) > 1
+            and duration > 0.005
+            and duration > self.slow_factor * averages[stage]
+        }
+        self._widget.group_widget.control_status.set_stage_timing(
+            last=durations, averages=averages, slow=slow
+        )
+
+    def _health_timer_ticks(self) -> None:
+        """Checks the instrument sessions while idle, a collection checks them itself."""
+        if not self._scheduler.collecting:
+            self._scheduler.submit(SchedulerCommand.CHECK)
+
     def _change_to_collecting(self) -> None:
         """Changes the collection status to collecting."""
         self.disable_widgets()
@@ -130,12 +294,12 @@ class MainController(QObject):
         self._widget.group_widget.control_status.lbl_repetition_status.setEnabled(False)
 
         self._widget.group_widget.control_status.lbl_repetition_status.setVisible(True)
+        self._widget.group_widget.control_status.btn_resume.setVisible(False)
+        self._widget.group_widget.control_status.lbl_progress.setVisible(True)
 
     def _change_to_idle(self) -> None:
         """Changes the collection status to idle."""
         self.enable_widgets()
-        self._aborting = False
-        self._collecting = False
 
         self._widget.group_widget.control_status.lbl_status.setText("Idle")
         self._widget.group_widget.control_status.btn_collection.setText("Collect")
@@ -146,12 +310,16 @@ class MainController(QObject):
 
         self._widget.group_widget.control_status.lbl_repetition_status.setVisible(False)
 
+        self._widget.group_widget.control_status.lbl_progress.setVisible(False)
+
         self._main_timer.stop()
+        self._timing_model.save()
+        self._update_resume_button()
 
     def _change_to_aborting(self) -> None:
         """Changes the collection status to aborting."""
         self._widget.group_widget.control_status.lbl_status.setText("Aborting")
-        self._aborting = True
+        self._scheduler.submit(SchedulerCommand.ABORT)
 
     def _change_current_repetition(self, repetition: int) -> None:
         """Changes the current status text of the repetitions."""
@@ -172,6 +340,10 @@ class MainController(QObject):
 
     def _check_for_valid_ip(self, field_name: str, ip: str) -> bool:
         """Checks if the input is a valid IPv4."""
+        # Full VISA resource names are passed as is, e.g. for the simulator
+        if "::" in ip:
+            return self._input_check_passed
+
         sections = ip.split(".")
 
         if len(sections) != 4:
@@ -216,6 +388,28 @@ class MainController(QObject):
             ):
                 return None
 
+        if (
+            self._experiment_controller.model.acquisition == "fastframe"
+            and self._experiment_controller.model.storage == "scope"
+        ):
+            message = (
+                "FastFrame acquisitions need a host storage mode. Please try again."
+            )
+            self._append_feedback(message)
+            MsgBox(msg=message)
+            self._input_check_passed = False
+            return None
+
+        if (
+            self._experiment_controller.model.storage == "hdf5"
+            and not Hdf5StorageModel.available()
+        ):
+            message = "HDF5 storage requires the h5py package. Please try again."
+            self._append_feedback(message)
+            MsgBox(msg=message)
+            self._input_check_passed = False
+            return None
+
         if not self._check_for_valid_ip(
             field_name="MSO", ip=self._setup_controller.model.mso
         ):
@@ -226,9 +420,23 @@ class MainController(QObject):
         ):
             return None
 
+    def _check_plan(self, plan: SweepPlanModel) -> bool:
+        """Checks that no two steps of the sweep plan write the same file."""
+        collisions = plan.collisions()
+        if collisions:
+            message = (
+                f"The sweep would write {collisions[0]} more than once, please check "
+                f"the frequencies for duplicates."
+            )
+            self._append_feedback(message)
+            MsgBox(msg=message)
+            return False
+
+        return True
+
     def _btn_collection_clicked(self) -> None:
         """Starts/stops a collection on button click."""
-        if self._collecting:
+        if self._scheduler.collecting:
             self.abort_triggered.emit()
             return None
 
@@ -238,43 +446,216 @@ class MainController(QObject):
         if not self._input_check_passed:
             return None
 
+        # The plan that is checked and estimated here is the one that runs
+        snapshot = self._snapshot()
+        plan = SweepPlanModel.compile(snapshot=snapshot)
+        if not self._check_plan(plan=plan):
+            return None
+        acquisitions = len(plan)
+
         _msg_question = QMessageBox.question(
             self._widget,
             "Collection confirmation",
-            f"The load and temperature of the experiment are {self._experiment_controller.model.load} tons and\n"
-            f"{self._experiment_controller.model.temperature} K, respectively.\n\n"
+            f"The load and temperature of the experiment are {snapshot.load} tons and\n"
+            f"{snapshot.temperature} K, respectively.\n\n"
+            f"{self._estimate_message(acquisitions=acquisitions)}\n\n"
             f"Are you sure you want to continue with the collection?",
         )
 
         if _msg_question != QMessageBox.Yes:
             return None
 
+        journal = JournalModel.create(
+            directory=self._journal_directory, parameters=snapshot.run_parameters()
+        )
+        self._settings.setValue("journal", journal.path)
+        self._start_collection(journal=journal, snapshot=snapshot, plan=plan)
+
+    def _btn_resume_clicked(self) -> None:
+        """Continues the last interrupted run from its first unconfirmed step."""
+        if self._scheduler.collecting:
+            return None
+
+        journal = self._last_journal()
+        if journal is None:
+            return None
+
+        snapshot = self._snapshot()
+        parameters = snapshot.run_parameters()
+        changed = [
+            key
+            for key, value in journal.parameters.items()
+            if parameters.get(key) != value
+        ]
+        if changed:
+            message = (
+                f"The {', '.join(changed)} value(s) changed since the interrupted run. "
+                f"Please restore them to resume the run."
+            )
+            self._append_feedback(message)
+            MsgBox(msg=message)
+            return None
+
+        plan = SweepPlanModel.compile(snapshot=snapshot)
+        if not self._check_plan(plan=plan):
+            return None
+
+        _msg_question = QMessageBox.question(
+            self._widget,
+            "Resume confirmation",
+            f"{journal.remaining} acquisition(s) of run {parameters['run_number']} are "
+            f"not collected yet.\n\n"
+            f"{self._estimate_message(acquisitions=journal.remaining)}\n\n"
+            f"Are you sure you want to resume the collection?",
+        )
+
+        if _msg_question != QMessageBox.Yes:
+            return None
+
+        self._append_feedback(message=f"Resuming the run journaled in {journal.path}.")
+        self._start_collection(journal=journal, snapshot=snapshot, plan=plan)
+
+    def _estimate_message(self, acquisitions: int) -> str:
+        """Returns the predicted run time of the given acquisitions."""
+        estimate = self._timing_model.estimate(
+            acquisition=self._experiment_controller.model.acquisition,
+            acquisitions=acquisitions,
+        )
+        if estimate is None:
+            return (
+                f"No run time estimate for the {acquisitions} acquisition(s) yet, it is "
+                f"learned from the first collection."
+            )
+
+        return (
+            f"The {acquisitions} acquisition(s) are estimated to take "
+            f"{datetime.timedelta(seconds=round(estimate))}."
+        )
+
+    def _start_collection(
+        self,
+        journal: JournalModel,
+        snapshot: ExperimentSnapshotModel,
+        plan: SweepPlanModel,
+    ) -> None:
+        """Switches to collecting and queues the collection on the scheduler."""
+        # The run values and the journal path must survive a crash during the run
+        self._settings.sync()
+
         self.collect_triggered.emit()
         self._start_time = datetime.datetime.now()
         self._main_timer.start(100)
-        self._collecting = True
+        self._scheduler.submit(
+            SchedulerCommand.COLLECT, journal=journal, snapshot=snapshot, plan=plan
+        )
         self._main_timer.start()
 
-    def _worker_process(self) -> None:
-        """Continuously run a thread to keep GUI from freezing."""
-        while not self._widget.terminated:
+    def _snapshot(self) -> ExperimentSnapshotModel:
+        """Takes a snapshot of the current setup and experiment values."""
+        return ExperimentSnapshotModel.capture(
+            setup_model=self._setup_controller.model,
+            experiment_model=self._experiment_controller.model,
+            basedir=self._setup_controller.basedir,
+        )
+
+    def _last_journal(self) -> Optional[JournalModel]:
+        """Loads the journal of the last run, if it can still be resumed."""
+        path = self._settings.value("journal", type=str)
+        if not path or not Path(path).is_file():
+            return None
+
+        journal = JournalModel.load(path=path)
+        if journal.completed or journal.remaining == 0:
+            return None
 
-            if self._collecting:
-                self._visa_controller.connect()
-                self._visa_controller.collect_data(abort_status=self._aborting)
-                self.finished.emit()
+        return journal
 
-            self._visa_controller.restore_defaults()
+    def _update_resume_button(self) -> None:
+        """Shows the resume button only when the last run was interrupted."""
+        journal = self._last_journal()
+        self._widget.group_widget.control_status.btn_resume.setVisible(
+            journal is not None
+        )
 
     def _visa_controller_message(self, message: str):
         """Adds some information on the feedback section."""
         self._append_feedback(message=message)
 
     def _append_feedback(self, message: str):
-        """Adds a new line with the input text on the feedback text widget."""
-        self._widget.group_widget.control_status.txt_feedback.appendPlainText(
-            f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] - {message}"
-        )
+        """Queues a new line with the input text for the feedback text widget."""
+        line = f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] - {message}"
+        self._feedback_log.info(line)
+        self._feedback.append(line)
+        if not self._feedback_timer.isActive():
+            self._feedback_timer.start()
+
+    def _flush_feedback(self) -> None:
+        """Adds the queued lines on the feedback text widget in a single update."""
+        if not self._feedback:
+            return None
+
+        with self._span("_flush_feedback"):
+            self._widget.group_widget.control_status.txt_feedback.appendPlainText(
+                "\n".join(self._feedback)
+            )
+        self._feedback.clear()
+
+    @staticmethod
+    def _create_event_log() -> Optional[EventLogModel]:
+        """Starts the event log of the session, collections run without it on errors."""
+        try:
+            return EventLogModel.create(
+                directory=Path(Path.home(), ".u-measure", "events").as_posix()
+            )
+        except OSError:
+            return None
+
+    def _close_event_log(self) -> None:
+        """Closes the event log once the scheduler has stopped, used on shutdown."""
+        if self._event_log is not None:
+            self._event_log.close()
+
+    def _start_metrics_server(self) -> None:
+        """Serves the metrics on the local /metrics endpoint, if enabled."""
+        if self._metrics is None:
+            return None
+
+        try:
+            self._metrics_server = MetricsController(metrics=self._metrics)
+        except OSError as error:
+            self._append_feedback(f"Metrics endpoint could not be started: {error}.")
+            return None
+
+        self._metrics_server.start()
+        self._append_feedback(f"Metrics served on {self._metrics_server.url}.")
+
+    def _stop_metrics_server(self) -> None:
+        """Stops the metrics endpoint, used on shutdown."""
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+
+    def _create_feedback_log(self) -> logging.Logger:
+        """Creates the rotating log file that keeps the full feedback history."""
+        logger = logging.getLogger("measure.feedback")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        if not logger.handlers:
+            try:
+                Path(self._log_directory).mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(
+                    Path(self._log_directory, "feedback.log").as_posix(),
+                    maxBytes=self.log_size,
+                    backupCount=self.log_backups,
+                    encoding="utf-8",
+                )
+            except OSError:
+                # The widget still shows the recent feedback without a log file
+                handler = logging.NullHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+
+        return logger
 
     def run(self, version: str) -> None:
         """Starts the application."""
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import queue
+import threading
+from enum import Enum
+from typing import Optional
+from qtpy.QtCore import QThread, Signal
+
+from measure.controller.visa_controller import VisaController
+from measure.model import (
+    CancellationModel,
+    ExperimentSnapshotModel,
+    JournalModel,
+    SweepPlanModel,
+)
+
+
+class SchedulerCommand(Enum):
+    """Commands that can be queued on the acquisition scheduler."""
+
+    COLLECT = "collect"
+    ABORT = "abort"
+    RECONNECT = "reconnect"
+    CHECK = "check"
+    SHUTDOWN = "shutdown"
+
+
+class SchedulerController(QThread):
+    """Runs every instrument command on a single thread that sleeps while idle."""
+
+    collection_finished: Signal = Signal()
+    new_feedback_message: Signal = Signal(str)
+
+    def __init__(self, visa_controller: VisaController) -> None:
+        super(SchedulerController, self).__init__()
+
+        self._visa_controller = visa_controller
+        self._commands: queue.Queue[SchedulerCommand] = queue.Queue()
+        self._collecting = False
+        self._cancellation = CancellationModel()
+        self._journal: Optional[JournalModel] = None
+        self._snapshot: Optional[ExperimentSnapshotModel] = None
+        self._plan: Optional[SweepPlanModel] = None
+
+    def submit(
+        self,
+        command: SchedulerCommand,
+        journal: Optional[JournalModel] = None,
+        snapshot: Optional[ExperimentSnapshotModel] = None,
+        plan: Optional[SweepPlanModel] = None,
+    ) -> None:
+        """Queues a new command for the scheduler thread.
+
+        Collections need a journal, the snapshot of the values to collect with and the
+        sweep plan compiled from it.
+        """
+        if command == SchedulerCommand.ABORT:
+            # Aborting can't wait behind the collection it is meant to stop
+            self._cancellation.cancel()
+            return None
+
+        if command == SchedulerCommand.COLLECT:
+            self._collecting = True
+            self._cancellation = CancellationModel()
+            self._journal = journal
+            self._snapshot = snapshot
+            self._plan = plan
+
+        self._commands.put(command)
+
+    def shutdown(self) -> None:
+        """Stops the scheduler thread once the current command is done."""
+        self.submit(SchedulerCommand.ABORT)
+        self.submit(SchedulerCommand.SHUTDOWN)
+        self.wait()
+
+    def run(self) -> None:
+        """Blocks on the command queue and runs the commands in order."""
+        threading.current_thread().name = "scheduler"
+        while True:
+            command = self._commands.get()
+
+            # An exception escaping run() would abort the whole application
+            try:
+                self._run_command(command=command)
+            except Exception as error:
+                self.new_feedback_message.emit(
+                    f"The {command.value} command failed, {type(error).__name__}: "
+                    f"{error}"
+                )
+
+            if command == SchedulerCommand.SHUTDOWN:
+                break
+
+    def _run_command(self, command: SchedulerCommand) -> None:
+        """Runs one command of the queue on the scheduler thread."""
+        if command == SchedulerCommand.SHUTDOWN:
+            self._visa_controller.close()
+        elif command == SchedulerCommand.COLLECT:
+            self._collect()
+        elif command == SchedulerCommand.RECONNECT:
+            self._visa_controller.reconnect()
+        elif command == SchedulerCommand.CHECK:
+            # Unhealthy sessions are reopened with the reconnect backoff
+            if not self._visa_controller.check_connections():
+                self._commands.put(SchedulerCommand.RECONNECT)
+
+    def _collect(self) -> None:
+        """Runs a full collection and restores the instrument defaults afterwards."""
+        try:
+            # A dead instrument is reported at once instead of after the backoff
+            self._visa_controller.connect(snapshot=self._snapshot, attempts=1)
+            self._visa_controller.collect_data(
+                cancellation=self._cancellation,
+                journal=self._journal,
+                snapshot=self._snapshot,
+                plan=self._plan,
+            )
+            self._visa_controller.restore_defaults(snapshot=self._snapshot)
+        finally:
+            self._collecting = False
+            self.collection_finished.emit()
+
+    @property
+    def collecting(self) -> bool:
+        return self._collecting
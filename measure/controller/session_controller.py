@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pyvisa import ResourceManager, VisaIOError
+from typing import Optional
+from qtpy.QtCore import QObject, Signal
+
+from measure.model import EventLogModel, InstrumentModel, MetricsModel, TracerModel
+
+
+class ConnectionFailed(Exception):
+    """Raised when one or more instruments could not be connected."""
+
+    def __init__(self, failures: dict[str, Exception]) -> None:
+        super(ConnectionFailed, self).__init__(", ".join(failures))
+        self.failures = failures
+
+
+class SessionController(QObject):
+    """Keeps one long-lived VISA session per instrument and checks its health."""
+
+    new_feedback_message: Signal = Signal(str)
+    session_state_changed: Signal = Signal(str, bool, float)
+
+    health_query: str = "*OPC?"
+    reconnect_attempts: int = 3
+    reconnect_delay: float = 0.5
+    connect_timeout: int = 2000
+
+    def __init__(
+        self,
+        event_log: Optional[EventLogModel] = None,
+        tracer: Optional[TracerModel] = None,
+        metrics: Optional[MetricsModel] = None,
+    ) -> None:
+        super(SessionController, self).__init__()
+
+        self.event_log = event_log
+        self.tracer = tracer
+        self.metrics = metrics
+        self._resource_manager = ResourceManager()
+        self._sessions: dict[str, InstrumentModel] = {}
+        self._addresses: dict[str, str] = {}
+
+    @staticmethod
+    def resource_name(address: str) -> str:
+        """Returns the VISA resource name for the given instrument address.
+
+        Full resource names pass through, e.g. the SOCKET resources of the simulator.
+        """
+        if "::" in address:
+            return address
+        return f"TCPIP::{address}::INSTR"
+
+    @staticmethod
+    def describe(error: Exception) -> str:
+        """Returns a feedback line for a VISA error or a refused socket connection."""
+        if isinstance(error, VisaIOError):
+            return f"VisaIOError: {error.description} ({error.error_code})."
+        return f"{type(error).__name__}: {error}."
+
+    def sessions(
+        self, addresses: dict[str, str], attempts: Optional[int] = None
+    ) -> dict[str, InstrumentModel]:
+        """Returns the sessions of all the instruments, connecting them concurrently.
+
+        Raises ConnectionFailed with the error of every instrument that is down.
+        """
+        with ThreadPoolExecutor(
+            max_workers=max(len(addresses), 1), thread_name_prefix="connect"
+        ) as executor:
+            futures = {
+                name: executor.submit(
+                    self.session, name=name, address=address, attempts=attempts
+                )
+                for name, address in addresses.items()
+            }
+
+        instruments: dict[str, InstrumentModel] = {}
+        failures: dict[str, Exception] = {}
+        for name, future in futures.items():
+            try:
+                instruments[name] = future.result()
+            # pyvisa-py reports a refused SOCKET connection as an OSError
+            except (VisaIOError, OSError) as error:
+                failures[name] = error
+
+        if failures:
+            raise ConnectionFailed(failures=failures)
+
+        return instruments
+
+    def session(
+        self, name: str, address: str, attempts: Optional[int] = None
+    ) -> InstrumentModel:
+        """Returns the open session of the instrument, reconnecting if it is unhealthy.
+
+        Without attempts, reconnect_attempts are made with an exponential backoff.
+        """
+        instrument = self._sessions.get(name)
+        if (
+            instrument is not None
+            and self._addresses[name] == address
+            and self.check(name=name)
+        ):
+            return instrument
+
+        if (
+            instrument is not None
+            and self._addresses[name] == address
+            and self.metrics is not None
+        ):
+            self.metrics.increment("measure_reconnects_total", instrument=name)
+        self.close(name=name)
+        return self._open(name=name, address=address, attempts=attempts)
+
+    def _open(
+        self, name: str, address: str, attempts: Optional[int] = None
+    ) -> InstrumentModel:
+        """Opens a new session, retrying with an exponential backoff on VISA errors."""
+        attempts = self.reconnect_attempts if attempts is None else attempts
+        delay = self.reconnect_delay
+        for attempt in range(1, attempts + 1):
+            try:
+                # Unreachable instruments fail fast with the short connect timeout
+                resource = self._resource_manager.open_resource(
+                    self.resource_name(address), open_timeout=self.connect_timeout
+                )
+                if self.resource_name(address).upper().endswith("::SOCKET"):
+                    # Raw sockets have no message framing other than the newline
+                    resource.read_termination = "\n"
+                    resource.write_termination = "\n"
+                timeout, resource.timeout = resource.timeout, self.connect_timeout
+                instrument = InstrumentModel(
+                    name=name,
+                    resource=resource,
+                    event_log=self.event_log,
+                    tracer=self.tracer,
+                    metrics=self.metrics,
+                )
+                identity = instrument.query("*IDN?").strip()
+                instrument.timeout = timeout
+            except (VisaIOError, OSError):
+                self.session_state_changed.emit(name, False, 0.0)
+                if attempt == attempts:
+                    raise
+                time.sleep(delay)
+                delay *= 2.0
+            else:
+                self._sessions[name] = instrument
+                self._addresses[name] = address
+                self.new_feedback_message.emit(identity)
+                self.check(name=name)
+                return instrument
+
+    def check(self, name: str) -> bool:
+        """Runs a cheap query on the instrument and reports its round-trip latency."""
+        instrument = self._sessions.get(name)
+        if instrument is None:
+            return False
+
+        start = time.perf_counter()
+        try:
+            instrument.query(self.health_query)
+        except (VisaIOError, OSError):
+            self.session_state_changed.emit(name, False, 0.0)
+            return False
+
+        latency = (time.perf_counter() - start) * 1000.0
+        self.session_state_changed.emit(name, True, latency)
+        return True
+
+    def check_all(self) -> bool:
+        """Checks the health of every open session, returns whether all are healthy."""
+        return all([self.check(name=name) for name in list(self._sessions)])
+
+    def close(self, name: str) -> None:
+        """Closes the session of the instrument, if there is one."""
+        instrument: Optional[InstrumentModel] = self._sessions.pop(name, None)
+        self._addresses.pop(name, None)
+        if instrument is None:
+            return None
+
+        try:
+            instrument.resource.close()
+        except (VisaIOError, OSError):
+            pass
+        self.session_state_changed.emit(name, False, 0.0)
+
+    def close_all(self) -> None:
+        """Closes every open session, used on shutdown."""
+        for name in list(self._sessions):
+            self.close(name=name)
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+from typing import Any, Optional
+from qtpy.QtCore import QSettings, QTimer, Signal
+
+
+class SettingsController(QSettings):
+    """QSettings that keeps changes in memory and writes them once editing is idle."""
+
+    writes_changed: Signal = Signal(int, int, int)
+
+    # Milliseconds without changes before the pending values are written
+    idle_interval: int = 500
+
+    def __init__(self, organization: str, application: str) -> None:
+        super(SettingsController, self).__init__(organization, application)
+
+        self._pending: dict[str, Any] = {}
+        self._writes = 0
+        self._flushes = 0
+
+        self._idle_timer = QTimer()
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(self.idle_interval)
+        self._idle_timer.timeout.connect(self.sync)
+
+    def setValue(self, key: str, value: Any) -> None:
+        """Keeps the value in memory and restarts the idle period."""
+        self._pending[key] = value
+        self._idle_timer.start()
+        self._emit_writes()
+
+    def value(
+        self, key: str, defaultValue: Any = None, type: Optional[type] = None
+    ) -> Any:
+        """Returns the pending value of the key, otherwise the stored one."""
+        if key in self._pending:
+            value = self._pending[key]
+            if type is None or value is None:
+                return value
+            return type(value)
+
+        if type is None:
+            return super(SettingsController, self).value(key, defaultValue)
+        return super(SettingsController, self).value(key, defaultValue, type=type)
+
+    def sync(self) -> None:
+        """Writes the pending values and flushes them to the permanent storage."""
+        self._idle_timer.stop()
+
+        for key, value in self._pending.items():
+            super(SettingsController, self).setValue(key, value)
+
+        if self._pending:
+            self._writes += len(self._pending)
+            self._flushes += 1
+            self._pending.clear()
+
+        super(SettingsController, self).sync()
+        self._emit_writes()
+
+    def _emit_writes(self) -> None:
+        self.writes_changed.emit(self._writes, self._flushes, len(self._pending))
+
+    @property
+    def writes(self) -> int:
+        return self._writes
+
+    @property
+    def flushes(self) -> int:
+        return self._flushes
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
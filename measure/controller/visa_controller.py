@@ -18,14 +18,33 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import numpy
 import time
+from contextlib import nullcontext
 from datetime import datetime
-from pyvisa import ResourceManager, VisaIOError
-from typing import Optional
+from pyvisa import VisaIOError
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, Optional
 from qtpy.QtCore import QObject, Signal
 
 
-from measure.model import SetupModel, ExperimentModel
+from measure.controller.session_controller import ConnectionFailed, SessionController
+from measure.controller.writer_controller import WriterController
+from measure.model import (
+    AcquisitionAborted,
+    CancellationModel,
+    EventLogModel,
+    ExperimentSnapshotModel,
+    Hdf5StorageModel,
+    InstrumentModel,
+    JournalModel,
+    MetricsModel,
+    SweepPlanModel,
+    SweepStepModel,
+    TracerModel,
+    WaveformPreambleModel,
+    WaveformModel,
+)
 
 
 class VisaController(QObject):
@@ -33,165 +52,724 @@ class VisaController(QObject):
 
     new_feedback_message = Signal(str)
     current_repetition = Signal(int)
+    connection_state = Signal(str, bool, float)
+    writer_status = Signal(int, float)
+    plan_compiled = Signal(int)
+    step_timing = Signal(dict)
+
+    # Completion probes, ordered from fastest to slowest ("poll" is the fallback)
+    completion_probes: dict[str, str] = {"esr": "*ESR?", "busy": "BUSY?"}
+    completion_poll_interval: float = 0.01
+    probe_timeout: int = 2000
 
     def __init__(
         self,
-        setup_model: SetupModel,
-        experiment_model: ExperimentModel,
-        basedir: str,
-        base_dir_changed: Signal(str),
+        event_log: Optional[EventLogModel] = None,
+        tracer: Optional[TracerModel] = None,
+        metrics: Optional[MetricsModel] = None,
     ) -> None:
         super(VisaController, self).__init__()
 
-        self._setup_model = setup_model
-        self._experiment_model = experiment_model
-        self._basedir = basedir
-
-        self._base_dir_changed = base_dir_changed
-        self._base_dir_changed.connect(self._update_base_dir)
-
-        self._resource_manager = ResourceManager()
-        self._mso_resource = None
-        self._afg_resource = None
+        self._event_log = event_log
+        self._tracer = tracer
+        self._metrics = metrics
+        self._sessions = SessionController(
+            event_log=event_log, tracer=tracer, metrics=metrics
+        )
+        self._sessions.new_feedback_message.connect(self.new_feedback_message)
+        self._sessions.session_state_changed.connect(self.connection_state)
+        self._mso: Optional[InstrumentModel] = None
+        self._afg: Optional[InstrumentModel] = None
+        self._completion_method = "poll"
+        self._writer = WriterController()
+        self._writer.new_feedback_message.connect(self.new_feedback_message)
+        self._writer.status_changed.connect(self.writer_status)
+        self._writer.start()
+
+        # One buffer per queued waveform, plus the one being written and the one
+        # being transferred
+        self._waveform_buffers = [
+            numpy.empty(0, dtype=numpy.float64) for _ in range(self._writer.maxsize + 2)
+        ]
+        self._buffer_index = 0
+        self._frames = 1
+        self._storage: Optional[Hdf5StorageModel] = None
+        self._journal: Optional[JournalModel] = None
+        self._snapshot: Optional[ExperimentSnapshotModel] = None
+        self._plan: Optional[SweepPlanModel] = None
+        self._afg_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="afg")
+        self._next_signal: Optional[Future] = None
+        self._cancellation = CancellationModel()
         self.connected = False
+        self._addresses: dict[str, str] = {}
 
-    def _update_base_dir(self, base_dir: str) -> None:
-        self._basedir = base_dir
-        print(base_dir)
-
-    def connect(self) -> None:
-        """Connects with the tek instruments."""
+    def connect(
+        self, snapshot: ExperimentSnapshotModel, attempts: Optional[int] = None
+    ) -> None:
+        """Connects with the tek instruments, reusing the open sessions when healthy.
+
+        The addresses are read from the snapshot, the live models belong to the gui
+        thread. A single attempt reports an instrument that is down right away, e.g.
+        before a collection.
+        """
+        self._addresses = {"MSO": snapshot.mso, "AFG": snapshot.afg}
+        self._connect(attempts=attempts)
+
+    def reconnect(self) -> None:
+        """Reopens the sessions of the last connection, retrying with the backoff."""
+        if not self._addresses:
+            return None
+
+        self.new_feedback_message.emit("Instrument session unhealthy, reconnecting.")
+        self._connect(attempts=None)
+
+    def _connect(self, attempts: Optional[int]) -> None:
+        """Opens the sessions of the current addresses and detects the firmware."""
+        previous_mso = self._mso
         try:
-            self._mso_resource = self._resource_manager.open_resource(
-                f"TCPIP::{self._setup_model.mso}::INSTR"
-            )
-            self._afg_resource = self._resource_manager.open_resource(
-                f"TCPIP::{self._setup_model.afg}::INSTR"
+            instruments = self._sessions.sessions(
+                addresses=self._addresses, attempts=attempts
             )
-        except VisaIOError as error:
+        except ConnectionFailed as error:
             self.connected = False
-            error_message = f"VisaIOError: {error.description} ({error.error_code})."
-            self.new_feedback_message.emit(error_message)
+            for name, failure in error.failures.items():
+                self.new_feedback_message.emit(
+                    f"{name} is unreachable. {SessionController.describe(failure)}"
+                )
         else:
             self.connected = True
-            self.new_feedback_message.emit(f"{self._mso_resource.query('*IDN?')}")
-            self.new_feedback_message.emit(f"{self._afg_resource.query('*IDN?')}")
+            self._mso = instruments["MSO"]
+            self._afg = instruments["AFG"]
+            # Reconnected sessions may talk to a different firmware
+            if self._mso is not previous_mso:
+                self._detect_completion_method()
+
+    def check_connections(self) -> bool:
+        """Checks the health and latency of the open instrument sessions."""
+        return self._sessions.check_all()
+
+    def close(self) -> None:
+        """Closes the instrument sessions, used on shutdown."""
+        self._afg_executor.shutdown(wait=True)
+        self._writer.stop()
+        self._sessions.close_all()
+        self._mso = None
+        self._afg = None
+        self.connected = False
 
-    def _acquire_signal(
-        self,
-        frequency: float,
-        abort_status: bool,
-        step: Optional[int] = 1,
-    ) -> None:
-        """Sends all the acquire commands to the mso instrument."""
+    def _detect_completion_method(self) -> None:
+        """Finds the fastest completion method supported by the mso firmware."""
+        timeout = self._mso.timeout
+        self._mso.timeout = self.probe_timeout
+
+        self._completion_method = "poll"
+        for method, probe in self.completion_probes.items():
+            try:
+                int(self._mso.query(probe).strip())
+            except (VisaIOError, ValueError):
+                # Clear the error queue left behind by the unsupported command
+                self._mso.write("*CLS")
+                continue
+            self._completion_method = method
+            break
+
+        self._mso.timeout = timeout
+        self.new_feedback_message.emit(
+            f"Using the '{self._completion_method}' completion method for the MSO."
+        )
+
+    def _mark_completion(self) -> None:
+        """Requests the operation complete event after the pending mso operations."""
+        if self._completion_method == "esr":
+            self._mso.write("*OPC")
+
+    def _wait_for_acquisition(self) -> None:
+        """Waits until the mso finishes the current acquisition sequence."""
+        with self._span("_wait_for_acquisition", method=self._completion_method):
+            self._wait_for_completion()
+
+    def _wait_for_completion(self) -> None:
+        """Polls the mso with the configured completion method."""
+        if self._completion_method == "esr":
+            return self._wait_for_esr()
 
-        self._mso_resource.write(":acquire:state stop")
-        self._mso_resource.write("acquire:stopafter sequence")
-        self._mso_resource.write(":acquire:state run")
+        if self._completion_method == "busy":
+            while int(self._mso.query("BUSY?").strip()) == 1:
+                self._cancellation.sleep(self.completion_poll_interval)
+            return None
 
+        # Fallback for firmware without status reporting support
         while (
-            self._mso_resource.query_ascii_values(":acquire:state?", converter="b")[0]
+            self._mso.query_ascii_values(":acquire:state?", converter="b")[0]
             == 1
         ):
-            if abort_status:
-                return None
-            time.sleep(1.0)
-        time.sleep(2.0)
+            self._cancellation.sleep(1.0)
+        self._cancellation.sleep(2.0)
 
-        self._mso_resource.write(":save:waveform:fileformat auto")
+    def _wait_for_save(self) -> None:
+        """Waits until the mso finishes writing the last waveform file."""
+        if self._completion_method == "esr":
+            return self._wait_for_esr()
 
-        run_number = self._setup_model.run_number
-        load = self._experiment_model.load
-        temperature = self._experiment_model.temperature
+        if self._completion_method == "busy":
+            # BUSY? only covers acquisitions, *OPC? blocks until the save is done
+            self._mso.query("*OPC?")
+            return None
 
-        timestamp = ""
-        if self._experiment_model.repetitions == 1:
-            timestamp = "_" + datetime.now().strftime("%m.%d.%Y_%H.%M.%S")
+        self._cancellation.sleep(2.0)
 
-        filename = (
-            self._basedir
-            + f"{run_number}_{load}ton_{temperature}K_{frequency}MHz{timestamp}"
-        )
-        if self._experiment_model.repetitions > 1:
-            scan = self._experiment_model.scan
-            filename += f"_{scan}{step}"
+    def _wait_for_esr(self) -> None:
+        """Polls the event status register until the operation complete bit is set."""
+        while not int(self._mso.query("*ESR?").strip()) & 1:
+            self._cancellation.sleep(self.completion_poll_interval)
 
-        filename += ".csv"
+    def _acquire_signal(self) -> None:
+        """Sends all the acquire commands to the mso instrument."""
 
-        self._mso_resource.write(f":save:waveform ch1, '{filename}'")
+        with self._span("_acquire_signal"), self._mso.batch():
+            self._mso.write(":acquire:state stop")
+            self._mso.set(":acquire:stopafter", "sequence")
+            self._mso.write(":acquire:state run")
+            self._mark_completion()
+
+    def _store_waveform(self, sweep_step: SweepStepModel) -> None:
+        """Saves the last acquired waveform on the mso or transfers it to the host."""
+        with self._span("_store_waveform", frequency=sweep_step.frequency):
+            self._store(sweep_step=sweep_step)
+
+    def _store(self, sweep_step: SweepStepModel) -> None:
+        """Saves or transfers the waveform of a sweep step."""
+        filename = sweep_step.filename
+        frequency = sweep_step.frequency
+        step = sweep_step.step
+
+        if self._snapshot.storage == "scope":
+            with self._mso.batch():
+                self._mso.set(":save:waveform:fileformat", "auto")
+                self._mso.write(f":save:waveform ch1, '{filename}'")
+                self._mark_completion()
+            self.new_feedback_message.emit(
+                f"Waveform data at {frequency}MHz save in file {filename}."
+            )
+            self._wait_for_save()
+            self._journal.record(step=step, frequency=frequency, filename=filename)
+        elif self._storage is not None:
+            waveform = self._transfer_waveform(
+                filename=filename, frequency=frequency, step=step
+            )
+            self._writer.submit(
+                sink=self._journaled(self._storage.append), waveform=waveform
+            )
+            self.new_feedback_message.emit(
+                f"Waveform data at {frequency}MHz queued for file {self._storage.path}."
+            )
+        else:
+            waveform = self._transfer_waveform(
+                filename=filename, frequency=frequency, step=step
+            )
+            self._writer.submit(
+                sink=self._journaled(WaveformModel.save_csv), waveform=waveform
+            )
+            self.new_feedback_message.emit(
+                f"Waveform data at {frequency}MHz queued for file {filename}."
+            )
 
-        self.new_feedback_message.emit(
-            f"Waveform data at {frequency}MHz save in file {filename}."
+    def _journaled(
+        self, sink: Callable[[WaveformModel], None]
+    ) -> Callable[[WaveformModel], None]:
+        """Wraps a writer sink so the waveform is journaled once it is on disk."""
+        journal = self._journal
+
+        def write(waveform: WaveformModel) -> None:
+            with self._span("write", file=waveform.filename):
+                sink(waveform)
+            journal.record(
+                step=waveform.step,
+                frequency=waveform.frequency,
+                filename=waveform.filename,
+            )
+            if self._metrics is not None:
+                self._metrics.set("measure_writer_queue_depth", self._writer.depth)
+
+        return write
+
+    def _configure_acquisition(self) -> None:
+        """Sets up the mso acquisition mode used by the collection."""
+        acquisition = self._snapshot.acquisition
+        self._frames = 1
+
+        with self._mso.batch():
+            if acquisition == "fastframe":
+                # Every repetition is captured as one frame of the segmented memory
+                self._frames = self._snapshot.repetitions
+                self._disable_averaging()
+                self._mso.set(":horizontal:fastframe:state", "on")
+                self._mso.set(":horizontal:fastframe:count", self._frames)
+            elif acquisition == "average":
+                # The sequence completes once the requested averages are acquired
+                self._mso.set(":horizontal:fastframe:state", "off")
+                self._mso.set(":acquire:mode", "average")
+                self._mso.set(":acquire:numavg", self._snapshot.repetitions)
+            else:
+                self._disable_averaging()
+                self._mso.set(":horizontal:fastframe:state", "off")
+
+    def _disable_averaging(self) -> None:
+        """Restores the sample mode, the register is only written when it differs.
+
+        After a reconnect the shadow registers are empty, so a scope left averaging by
+        an earlier session is switched back as well.
+        """
+        self._mso.set(":acquire:mode", "sample")
+
+    def _configure_transfer(self) -> None:
+        """Sets up the binary curve transfer and preallocates the waveform buffer."""
+        with self._mso.batch():
+            self._mso.set(":data:source", "ch1")
+            self._mso.set(":data:encdg", "ribinary")
+            self._mso.set(":data:width", 2)
+            self._mso.set(":data:start", 1)
+            if self._frames > 1:
+                self._mso.set(":data:framestart", 1)
+                self._mso.set(":data:framestop", self._frames)
+
+        record_length = int(
+            float(self._mso.query(":horizontal:recordlength?").split(" ")[-1])
+        )
+        self._mso.set(":data:stop", record_length)
+
+        for index, buffer in enumerate(self._waveform_buffers):
+            if buffer.size < record_length * self._frames:
+                self._waveform_buffers[index] = numpy.empty(
+                    record_length * self._frames, dtype=numpy.float64
+                )
+
+    def _transfer_waveform(
+        self, filename: str, frequency: float, step: Optional[int] = 1
+    ) -> WaveformModel:
+        """Pulls the last acquired record from the mso as 16-bit binary data."""
+        preamble = WaveformPreambleModel.from_response(
+            self._mso.query(WaveformPreambleModel.query)
+        )
+        raw = self._mso.query_binary_values(
+            ":curve?", datatype="h", is_big_endian=True, container=numpy.array
         )
 
-        time.sleep(2.0)
+        volts = preamble.scale(raw=raw, out=self._next_buffer(size=raw.size))
+        timestamps: tuple[str, ...] = ()
+        if self._frames > 1:
+            volts = volts.reshape(self._frames, -1)
+            timestamps = self._frame_timestamps()
+
+        return WaveformModel(
+            filename=filename,
+            frequency=frequency,
+            preamble=preamble,
+            volts=volts,
+            timestamps=timestamps,
+            step=step,
+            acquired=time.time(),
+        )
+
+    def _next_buffer(self, size: int) -> numpy.ndarray:
+        """Returns the next buffer of the pool, none of them is still being written."""
+        self._buffer_index = (self._buffer_index + 1) % len(self._waveform_buffers)
+        if self._waveform_buffers[self._buffer_index].size < size:
+            self._waveform_buffers[self._buffer_index] = numpy.empty(
+                size, dtype=numpy.float64
+            )
+        return self._waveform_buffers[self._buffer_index]
+
+    def _frame_timestamps(self) -> tuple[str, ...]:
+        """Returns the trigger timestamps of all the FastFrame frames."""
+        try:
+            response = self._mso.query(":horizontal:fastframe:timestamp:all:ch1?")
+        except VisaIOError:
+            # Older firmware only reports the timestamps of single frames
+            return ()
+
+        # With HEADER ON the response starts with the command header, the timestamps
+        # themselves contain spaces
+        response = response.strip()
+        if response.startswith(":"):
+            response = response.split(" ", 1)[-1]
+
+        return tuple(timestamp.strip().strip('"') for timestamp in response.split(","))
 
-    def _send_signal(self, frequency: float, number_of_cycles: int) -> None:
+    def _send_signal(self, sweep_step: SweepStepModel) -> None:
         """Sends the collection commands to the afg instrument."""
-        vpp = self._setup_model.vpp
 
-        self._afg_resource.write(":output1:state off")
-        self._afg_resource.write(":source1:burst:ncycles 1")
+        # Only a new waveform shape or amplitude requires the output to be off,
+        # frequency changes are applied between bursts
+        # The trailing *OPC? makes sure the excitation is active before any waveform
+        # is acquired
+        span = self._span("_send_signal", frequency=sweep_step.frequency)
+        with span, self._afg.batch(sync=True):
+            if self._afg.changed(
+                ":source1:function:shape", sweep_step.shape
+            ) or self._afg.changed(":source1:voltage", sweep_step.vpp):
+                self._afg.set(":output1:state", "off")
+
+            for header, value in sweep_step.afg_settings:
+                self._afg.set(header, value)
+
+        self.new_feedback_message.emit(
+            f"Sending {sweep_step.number_of_cycles} cycle(s) {sweep_step.frequency}MHz "
+            f"signal with Vpp = {sweep_step.vpp}V."
+        )
 
-        if number_of_cycles == 2:
-            self._afg_resource.write(":source1:function:shape user1")
-            self._afg_resource.write(f":source1:frequency {frequency * 1.0e6/2.0}")
+    def collect_data(
+        self,
+        cancellation: CancellationModel,
+        journal: JournalModel,
+        snapshot: ExperimentSnapshotModel,
+        plan: SweepPlanModel,
+    ) -> None:
+        """Runs the data collection loop, accounts for multiple iterations.
+
+        The collection only reads the snapshot taken when it was started and the plan
+        compiled from it, edits made in the meantime apply to the next one. Steps
+        already confirmed in the journal are skipped, which resumes an interrupted run.
+        """
+
+        if not self.connected:
+            return None
+
+        self._snapshot = snapshot
+        self._plan = plan
+        collisions = self._plan.collisions()
+        if collisions:
+            self.new_feedback_message.emit(
+                f"Collection refused, the sweep plan writes {collisions[0]} "
+                f"more than once."
+            )
+            return None
+
+        self._journal = journal
+        self._cancellation = cancellation
+        self._cancellation.on_cancel(self._interrupt_instruments)
+        self._mso.cancellation = cancellation
+        self._afg.cancellation = cancellation
+        self._writer.reset_statistics()
+
+        if self._tracer is not None:
+            self._tracer.start()
+        if self._metrics is not None:
+            self._metrics.set("measure_collecting", 1)
+        with self._span("collect_data", run_number=snapshot.run_number):
+            self._run_collection()
+        if self._metrics is not None:
+            self._metrics.set("measure_collecting", 0)
+        self._write_trace(name=f"trace_{snapshot.run_number}")
+
+    def _run_collection(self) -> None:
+        """Runs the collection loop, leaving the instruments safe when it fails."""
+        try:
+            self._collection_loop()
+        except AcquisitionAborted:
+            self._release_cancellation()
+            self._safe_state()
+            self.new_feedback_message.emit(
+                f"Collection aborted, instruments were safe "
+                f"{self._cancellation.latency * 1000.0:.0f} ms after the request."
+            )
+        except VisaIOError as error:
+            error_message = f"VisaIOError: {error.description} ({error.error_code})."
+            self.new_feedback_message.emit(error_message)
+        except OSError as error:
+            # e.g. an HDF5 run file that is locked by a viewer
+            self._release_cancellation()
+            self._safe_state()
+            self.new_feedback_message.emit(f"Collection stopped, {error}.")
+        finally:
+            self._release_cancellation()
+            self._flush_writer()
+            self._close_storage()
+
+            # Failed writes are not journaled, so such a run remains resumable
+            if self._journal.remaining == 0:
+                self._journal.complete()
+
+    def _span(self, name: str, **args: Any) -> ContextManager[None]:
+        """Returns a trace span of the collection, a no-op without a tracer."""
+        if self._tracer is None:
+            return nullcontext()
+        return self._tracer.span(name=name, category="collection", **args)
+
+    def _write_trace(self, name: str) -> None:
+        """Writes the trace of the collection, if tracing is enabled."""
+        if self._tracer is None:
+            return None
+
+        try:
+            path = self._tracer.write(name=name)
+        except OSError as error:
+            self.new_feedback_message.emit(f"Trace could not be written: {error}.")
         else:
-            self._afg_resource.write(":source1:function:shape sin")
-            self._afg_resource.write(f":source1:frequency {frequency * 1.0e6}")
+            self.new_feedback_message.emit(
+                f"Trace of the collection written to {path}."
+            )
+
+    def _flush_writer(self) -> None:
+        """Waits for the queued waveforms, also after an abort, and reports the writer."""
+        start = time.perf_counter()
+        self._writer.flush()
+        if self._writer.writes == 0:
+            return None
 
-        self._afg_resource.write(f":source1:voltage {vpp}")
-        self._afg_resource.write(":source1:phase 0.0e0")
-        self._afg_resource.write(":source1:voltage:offset 0.0e0")
-        self._afg_resource.write(":output1:state on")
+        self.new_feedback_message.emit(
+            f"Writer flushed in {time.perf_counter() - start:.3f}s, "
+            f"{self._writer.writes} file(s) written, max queue depth "
+            f"{self._writer.max_depth}/{self._writer.maxsize}, mean flush latency "
+            f"{self._writer.total_latency / max(self._writer.writes, 1) * 1000.0:.1f} ms."
+        )
 
+    def _open_storage(self) -> None:
+        """Opens the HDF5 run file, when it is the selected storage mode."""
+        snapshot = self._snapshot
+        if snapshot.storage != "hdf5":
+            return None
+
+        self._storage = Hdf5StorageModel(
+            path=snapshot.basedir + f"{snapshot.run_number}.h5",
+            collection=f"{snapshot.load}ton_{snapshot.temperature}K_{snapshot.scan}",
+            attributes={
+                "run_number": snapshot.run_number,
+                "load": snapshot.load,
+                "temperature": snapshot.temperature,
+                "vpp": snapshot.vpp,
+                "scan": snapshot.scan,
+                "acquisition": snapshot.acquisition,
+                "started": datetime.now().isoformat(),
+            },
+        )
+        self._storage.open()
+
+    def _close_storage(self) -> None:
+        """Closes the HDF5 run file of the collection, if there is one."""
+        if self._storage is not None:
+            self._storage.close()
+            self._storage = None
+
+    def _collection_loop(self) -> None:
+        """Runs the sweeps of the compiled plan, one per repetition."""
+        standard = self._snapshot.acquisition == "standard"
+
+        self._resync_instruments()
+        self._configure_acquisition()
+
+        if self._snapshot.storage != "scope":
+            self._configure_transfer()
+            self._open_storage()
+
+        pending = [
+            [sweep_step for sweep_step in sweep if not self._is_journaled(sweep_step)]
+            for sweep in self._plan.sweeps
+        ]
+        remaining = sum(len(sweep) for sweep in pending)
+        self.plan_compiled.emit(remaining)
+        if self._metrics is not None:
+            self._metrics.set("measure_remaining_acquisitions", remaining)
         self.new_feedback_message.emit(
-            f"Sending {number_of_cycles} cycle(s) {frequency}MHz signal with Vpp = {vpp}V."
+            f"Sweep plan compiled with {len(self._plan)} acquisition(s), "
+            f"{remaining} remaining."
         )
 
-    def collect_data(self, abort_status: bool) -> None:
-        """Runs the data collection loop, accounts for multiple iterations."""
+        for repetition, sweep in enumerate(pending, start=1):
 
-        if self.connected:
-            repetitions = self._experiment_model.repetitions
-            current_index = 0
+            self._cancellation.check()
 
-            file_number = self._experiment_model.file_number
+            if sweep:
+                if standard:
+                    self._report_repetition(repetition=repetition)
+                self._collection_process(sweep=sweep)
 
-            while repetitions > 0:
+        if not standard:
+            # A single FastFrame or averaged sweep covers all the repetitions
+            self._report_repetition(repetition=self._snapshot.repetitions)
 
-                if abort_status:
-                    return None
+    def _report_repetition(self, repetition: int) -> None:
+        """Shows the repetition in progress and exposes it to the metrics."""
+        self.current_repetition.emit(repetition)
+        if self._metrics is not None:
+            self._metrics.set("measure_current_repetition", repetition)
 
-                current_index += 1
-                self.current_repetition.emit(current_index)
-                self._collection_process(abort_status=abort_status, step=file_number)
-                repetitions -= 1
-                file_number += 1
+    def _is_journaled(self, sweep_step: SweepStepModel) -> bool:
+        """Returns whether the journal already confirmed the given step."""
+        return self._journal.is_done(
+            step=sweep_step.step, frequency=sweep_step.frequency
+        )
 
-    def restore_defaults(self) -> None:
-        reset_frequency = self._experiment_model.reset_frequency
-        """Sends some default values to the instruments."""
-        if self.connected:
-            self._afg_resource.write(":source1:burst:ncycles 1")
-            self._afg_resource.write(":source1:function:shape user1")
-            self._afg_resource.write(f":source1:frequency {reset_frequency * 1.0e6 / 2.0}")
-            self._afg_resource.write(":output1:state on")
+    def _interrupt_instruments(self) -> None:
+        """Unblocks instrument calls that are waiting on a response, runs on abort."""
+        self._mso.interrupt()
+        self._afg.interrupt()
+
+    def _release_cancellation(self) -> None:
+        """Waits for the pending afg setup and detaches the instruments from the run."""
+        if self._next_signal is not None:
+            try:
+                self._next_signal.result()
+            except (AcquisitionAborted, VisaIOError):
+                pass
+            self._next_signal = None
+
+        self._mso.cancellation = None
+        self._afg.cancellation = None
+
+    def _safe_state(self) -> None:
+        """Stops the acquisition and the excitation after an aborted collection."""
+        # Interrupted batches may have been applied partially
+        self._mso.invalidate()
+        self._afg.invalidate()
+
+        # Each instrument is made safe even if the other one no longer responds
+        try:
+            self._afg.write(":output1:state off")
+        except VisaIOError as error:
+            self._visa_error(error=error, context="turning the AFG output off")
+        try:
+            with self._mso.batch():
+                self._mso.write("*CLS")
+                self._mso.write(":acquire:state stop")
+        except VisaIOError as error:
+            self._visa_error(error=error, context="stopping the MSO acquisition")
 
-            self._mso_resource.write("acquire:stopafter runstop")
-            self._mso_resource.write(":acquire:state run")
+    def _visa_error(self, error: VisaIOError, context: str) -> None:
+        """Reports a VISA error that can't stop the current command."""
+        self.new_feedback_message.emit(
+            f"VisaIOError while {context}: {error.description} ({error.error_code})."
+        )
 
-    def _collection_process(self, abort_status: bool, step: Optional[int] = 1) -> None:
-        """The collection process for one iteration, multiple frequencies can be used."""
+    def restore_defaults(self, snapshot: ExperimentSnapshotModel) -> None:
+        """Sends some default values to the instruments."""
+        if not self.connected:
+            return None
 
-        for index, frequency in enumerate(self._experiment_model.frequencies):
+        reset_frequency = snapshot.reset_frequency
 
-            if frequency > self._experiment_model.threshold:
-                number_of_cycles = 2
-            else:
-                number_of_cycles = 1
+        try:
+            with self._afg.batch():
+                self._afg.set(":source1:burst:ncycles", 1)
+                self._afg.set(":source1:function:shape", "user1")
+                self._afg.set(":source1:frequency", reset_frequency * 1.0e6 / 2.0)
+                self._afg.set(":output1:state", "on")
+
+            with self._mso.batch():
+                self._mso.set(":horizontal:fastframe:state", "off")
+                self._disable_averaging()
+                self._mso.set(":acquire:stopafter", "runstop")
+                self._mso.write(":acquire:state run")
+        except VisaIOError as error:
+            self._visa_error(error=error, context="restoring the instrument defaults")
+
+    def _resync_instruments(self) -> None:
+        """Verifies the shadowed settings against the instruments before a collection."""
+        for instrument in (self._mso, self._afg):
+            mismatches = instrument.verify()
+            if mismatches:
+                self.new_feedback_message.emit(
+                    f"{instrument.name} settings changed outside U-Measure: "
+                    f"{', '.join(mismatches)}."
+                )
+
+    def _collection_process(self, sweep: list[SweepStepModel]) -> None:
+        """The collection process for one iteration, multiple frequencies can be used.
+
+        The afg is configured for the next frequency while the mso stores the waveform
+        of the current one. The next acquisition is only armed once the afg reports
+        that the new excitation is active.
+        """
+        if not sweep:
+            return None
+
+        with self._span("_collection_process", step=sweep[0].step):
+            self._sweep(sweep=sweep)
+
+    def _sweep(self, sweep: list[SweepStepModel]) -> None:
+        """Configures, acquires and stores every frequency of a sweep."""
+        configure_time = self._timed(self._send_signal, sweep_step=sweep[0])
+
+        saved_time = 0.0
+        saved_round_trips = self._mso.saved_round_trips + self._afg.saved_round_trips
+        for index, sweep_step in enumerate(sweep):
+
+            if self._metrics is not None:
+                self._metrics.set("measure_current_frequency_mhz", sweep_step.frequency)
+
+            step_start = time.perf_counter()
+            arm_time = self._timed(self._acquire_signal)
+            acquire_time = self._timed(self._wait_for_acquisition)
+
+            overlap_start = time.perf_counter()
+
+            if index < len(sweep) - 1:
+                self._next_signal = self._afg_executor.submit(
+                    self._timed, self._send_signal, sweep_step=sweep[index + 1]
+                )
+
+            store_time = self._timed(self._store_waveform, sweep_step=sweep_step)
+
+            next_configure_time = 0.0
+            if self._next_signal is not None:
+                next_configure_time = self._next_signal.result()
+                self._next_signal = None
+                saved_time += (
+                    next_configure_time
+                    + store_time
+                    - (time.perf_counter() - overlap_start)
+                )
+
+            # Settling covers the wait for the next afg setup and the loop overhead
+            durations = {
+                "configure": configure_time,
+                "arm": arm_time,
+                "acquire": acquire_time,
+                "save": store_time,
+                "settle": max(
+                    time.perf_counter()
+                    - step_start
+                    - arm_time
+                    - acquire_time
+                    - store_time,
+                    0.0,
+                ),
+            }
+            if self._tracer is not None:
+                self._tracer.instant("step_timing emitted", category="signal")
+            self.step_timing.emit(durations)
+            if self._metrics is not None:
+                self._record_metrics(durations=durations)
+            if self._event_log is not None:
+                self._event_log.record(
+                    event="step",
+                    step=sweep_step.step,
+                    frequency=sweep_step.frequency,
+                    **durations,
+                )
+            configure_time = next_configure_time
+
+        saved_round_trips = (
+            self._mso.saved_round_trips
+            + self._afg.saved_round_trips
+            - saved_round_trips
+        )
+        self.new_feedback_message.emit(
+            f"Sweep pipelining saved {max(saved_time, 0.0):.3f}s of instrument idle time, "
+            f"command batching saved {saved_round_trips} SCPI round-trips."
+        )
 
-            self._send_signal(frequency=frequency, number_of_cycles=number_of_cycles)
-            self._acquire_signal(
-                frequency=frequency, step=step, abort_status=abort_status
-            )
+    def _record_metrics(self, durations: dict[str, float]) -> None:
+        """Counts a completed acquisition and records its stage durations."""
+        self._metrics.increment("measure_acquisitions_completed_total")
+        self._metrics.increment("measure_remaining_acquisitions", -1.0)
+        self._metrics.set("measure_writer_queue_depth", self._writer.depth)
+        for stage, duration in durations.items():
+            self._metrics.observe("measure_stage_seconds", duration, stage=stage)
+
+    @staticmethod
+    def _timed(method: Callable, **kwargs: Any) -> float:
+        """Runs the given method and returns its duration in seconds."""
+        start = time.perf_counter()
+        method(**kwargs)
+        return time.perf_counter() - start
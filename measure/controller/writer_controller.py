@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import queue
+import threading
+import time
+from typing import Callable, Optional
+from qtpy.QtCore import QThread, Signal
+
+from measure.model import WaveformModel
+
+
+class WriterController(QThread):
+    """Writes the transferred waveforms to disk without blocking the acquisition.
+
+    The queue is bounded, so a slow disk applies back-pressure to the acquisition
+    instead of filling up the memory.
+    """
+
+    new_feedback_message: Signal = Signal(str)
+    status_changed: Signal = Signal(int, float)
+
+    def __init__(self, maxsize: int = 8) -> None:
+        super(WriterController, self).__init__()
+
+        self._queue: queue.Queue[
+            Optional[tuple[Callable[[WaveformModel], None], WaveformModel]]
+        ] = queue.Queue(maxsize=maxsize)
+
+        self.max_depth = 0
+        self.writes = 0
+        self.total_latency = 0.0
+
+    @property
+    def maxsize(self) -> int:
+        return self._queue.maxsize
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def reset_statistics(self) -> None:
+        """Resets the queue depth and latency statistics, used before a collection."""
+        self.max_depth = 0
+        self.writes = 0
+        self.total_latency = 0.0
+
+    def submit(
+        self, sink: Callable[[WaveformModel], None], waveform: WaveformModel
+    ) -> None:
+        """Queues the waveform for the given sink, blocking while the queue is full."""
+        self._queue.put((sink, waveform))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def flush(self) -> None:
+        """Blocks until every queued waveform has been written."""
+        self._queue.join()
+
+    def stop(self) -> None:
+        """Writes the remaining waveforms and stops the writer thread."""
+        self._queue.put(None)
+        self.wait()
+
+    def run(self) -> None:
+        """Writes the queued waveforms in order."""
+        threading.current_thread().name = "writer"
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+
+                sink, waveform = item
+                start = time.perf_counter()
+                # Any error escaping run() would abort the application and leave
+                # flush() waiting on the queue forever
+                try:
+                    sink(waveform)
+                except Exception as error:
+                    self.new_feedback_message.emit(
+                        f"Failed to write the {waveform.frequency}MHz waveform: {error}"
+                    )
+
+                latency = time.perf_counter() - start
+                self.writes += 1
+                self.total_latency += latency
+                self.status_changed.emit(self._queue.qsize(), latency * 1000.0)
+            finally:
+                self._queue.task_done()
@@ -21,4 +21,14 @@
 from measure.model.setup_model import SetupModel
 from measure.model.experiment_model import ExperimentModel
 from measure.model.path_model import PathModel
-from measure.model.qt_worker_model import QtWorkerModel
+from measure.model.waveform_model import WaveformPreambleModel, WaveformModel
+from measure.model.storage_model import Hdf5StorageModel
+from measure.model.cancellation_model import AcquisitionAborted, CancellationModel
+from measure.model.event_log_model import EventLogModel
+from measure.model.tracer_model import TracerModel
+from measure.model.metrics_model import MetricsModel
+from measure.model.instrument_model import InstrumentModel
+from measure.model.snapshot_model import ExperimentSnapshotModel
+from measure.model.journal_model import JournalModel
+from measure.model.sweep_plan_model import SweepStepModel, SweepPlanModel
+from measure.model.timing_model import TimingModel
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+class AcquisitionAborted(Exception):
+    """Raised inside the acquisition stack once a collection has been cancelled."""
+
+
+@dataclass(slots=True)
+class CancellationModel:
+    """Dataclass that holds the cancellation state shared by a whole collection."""
+
+    _event: threading.Event = field(
+        init=False, repr=False, compare=False, default_factory=threading.Event
+    )
+    _requested_at: Optional[float] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+    _callbacks: list[Callable[[], None]] = field(
+        init=False, repr=False, compare=False, default_factory=list
+    )
+
+    def cancel(self) -> None:
+        """Cancels the collection and interrupts any blocking instrument call."""
+        if self._event.is_set():
+            return None
+
+        self._requested_at = time.perf_counter()
+        self._event.set()
+        for callback in self._callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Registers a method that runs on the cancelling thread when cancelled."""
+        self._callbacks.append(callback)
+
+    def check(self) -> None:
+        """Raises AcquisitionAborted if the collection has been cancelled."""
+        if self._event.is_set():
+            raise AcquisitionAborted()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleeps for the given time, waking up as soon as the collection is cancelled."""
+        if self._event.wait(seconds):
+            raise AcquisitionAborted()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def latency(self) -> float:
+        """Seconds since the cancellation was requested."""
+        if self._requested_at is None:
+            return 0.0
+        return time.perf_counter() - self._requested_at
@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import json
+import numpy
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, IO, Optional
+
+
+@dataclass(slots=True)
+class EventLogModel:
+    """Dataclass that writes every instrument call and acquisition step as JSON lines.
+
+    Timestamps are monotonic seconds, the first line maps them to the wall clock.
+    """
+
+    path: str = field(compare=False)
+
+    _file: Optional[IO[str]] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+    _lock: threading.Lock = field(
+        init=False, repr=False, compare=False, default_factory=threading.Lock
+    )
+
+    @classmethod
+    def create(cls, directory: str) -> "EventLogModel":
+        """Starts the event log of an application session."""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        event_log = cls(path=Path(directory, f"events_{timestamp}.jsonl").as_posix())
+        event_log._file = open(event_log.path, "a", encoding="utf-8")
+        event_log.record(event="start", time=datetime.now().isoformat())
+        return event_log
+
+    def record(self, event: str, **values: Any) -> None:
+        """Appends an event, stamped with the monotonic clock."""
+        entry = {"event": event, "t": time.monotonic(), **values}
+        with self._lock:
+            if self._file is None:
+                return None
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def scpi(
+        self,
+        instrument: str,
+        method: str,
+        command: str,
+        start: float,
+        duration: float,
+        size: int,
+        error: Optional[str] = None,
+    ) -> None:
+        """Appends an instrument call, the size is the response size in bytes."""
+        values = {
+            "instrument": instrument,
+            "method": method,
+            "command": command,
+            "start": start,
+            "duration": duration,
+            "size": size,
+        }
+        if error is not None:
+            values["error"] = error
+        self.record(event="scpi", **values)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def response_size(response: Any) -> int:
+        """Returns the size in bytes of a query response, writes have none."""
+        if isinstance(response, (str, bytes)):
+            return len(response)
+        if isinstance(response, numpy.ndarray):
+            return int(response.nbytes)
+        if isinstance(response, (list, tuple)):
+            return len(response)
+        return 0
+
+    @staticmethod
+    def command_key(command: str) -> str:
+        """Returns the headers of a, possibly compound, command without the values."""
+        return ";".join(
+            part.strip().split(" ")[0].lstrip(":").lower()
+            for part in command.split(";")
+            if part.strip()
+        )
+
+    @classmethod
+    def analyze(
+        cls, path: str, percentiles: tuple[float, ...] = (50.0, 90.0, 99.0)
+    ) -> dict[str, dict[str, float]]:
+        """Returns the latency percentiles in ms of every instrument command."""
+        durations: dict[str, list[float]] = defaultdict(list)
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if entry.get("event") != "scpi":
+                    continue
+                key = f"{entry['instrument']} {cls.command_key(entry['command'])}"
+                durations[key].append(entry["duration"] * 1000.0)
+
+        report: dict[str, dict[str, float]] = {}
+        for key, values in durations.items():
+            samples = numpy.asarray(values)
+            report[key] = {
+                "count": float(samples.size),
+                "total": float(samples.sum()),
+                **{
+                    f"p{percentile:g}": float(numpy.percentile(samples, percentile))
+                    for percentile in percentiles
+                },
+            }
+
+        return dict(
+            sorted(report.items(), key=lambda item: item[1]["total"], reverse=True)
+        )
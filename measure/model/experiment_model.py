@@ -38,6 +38,8 @@ class ExperimentModel:
     _scan: str = field(init=False, repr=False, compare=False, default="A")
     _load: float = field(init=False, repr=False, compare=False, default=0.0)
     _temperature: float = field(init=False, repr=False, compare=False, default=0.0)
+    _storage: str = field(init=False, repr=False, compare=False, default="scope")
+    _acquisition: str = field(init=False, repr=False, compare=False, default="standard")
 
     def __post_init__(self) -> None:
         object.__setattr__(self, "_scan", self.settings.value("scan", type=str))
@@ -81,6 +83,18 @@ class ExperimentModel:
             temperature_value = 0.0
         object.__setattr__(self, "_temperature", temperature_value)
 
+        # Set storage value
+        storage_value = self.settings.value("storage", type=str)
+        if not storage_value:
+            storage_value = "scope"
+        object.__setattr__(self, "_storage", storage_value)
+
+        # Set acquisition value
+        acquisition_value = self.settings.value("acquisition", type=str)
+        if not acquisition_value:
+            acquisition_value = "standard"
+        object.__setattr__(self, "_acquisition", acquisition_value)
+
     def set_experiment_defaults(self) -> None:
         """Sets the default values for the experiment section."""
         object.__setattr__(self, "_frequencies", [20.0, 30.0, 40.0, 50.0, 60.0])
@@ -91,6 +105,8 @@ class ExperimentModel:
         object.__setattr__(self, "_scan", "A")
         object.__setattr__(self, "_load", 1)
         object.__setattr__(self, "_temperature", 1)
+        object.__setattr__(self, "_storage", "scope")
+        object.__setattr__(self, "_acquisition", "standard")
 
     def _convert_array(self) -> list[float]:
         """Converts the saved array to list[float]."""
@@ -133,6 +149,14 @@ class ExperimentModel:
     def temperature(self) -> float:
         return self._temperature
 
+    @property
+    def storage(self) -> str:
+        return self._storage
+
+    @property
+    def acquisition(self) -> str:
+        return self._acquisition
+
     @frequencies.setter
     def frequencies(self, value) -> None:
         if isinstance(value, list):
@@ -180,3 +204,15 @@ class ExperimentModel:
         if isinstance(value, float):
             object.__setattr__(self, "_temperature", value)
             self.settings.setValue("temperature", self._temperature)
+
+    @storage.setter
+    def storage(self, value) -> None:
+        if isinstance(value, str):
+            object.__setattr__(self, "_storage", value)
+            self.settings.setValue("storage", self._storage)
+
+    @acquisition.setter
+    def acquisition(self, value) -> None:
+        if isinstance(value, str):
+            object.__setattr__(self, "_acquisition", value)
+            self.settings.setValue("acquisition", self._acquisition)
@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pyvisa import VisaIOError
+from typing import Any, Iterator, Optional
+
+from measure.model.cancellation_model import AcquisitionAborted, CancellationModel
+from measure.model.event_log_model import EventLogModel
+from measure.model.metrics_model import MetricsModel
+from measure.model.tracer_model import TracerModel
+
+
+@dataclass(slots=True)
+class InstrumentModel:
+    """Dataclass that wraps a VISA resource and shadows the last written settings."""
+
+    name: str = field(compare=False)
+    resource: Any = field(repr=False, compare=False)
+    max_message_length: int = field(repr=False, compare=False, default=1024)
+    event_log: Optional[EventLogModel] = field(repr=False, compare=False, default=None)
+    tracer: Optional[TracerModel] = field(repr=False, compare=False, default=None)
+    metrics: Optional[MetricsModel] = field(repr=False, compare=False, default=None)
+
+    round_trips: int = field(init=False, repr=False, compare=False, default=0)
+    saved_round_trips: int = field(init=False, repr=False, compare=False, default=0)
+    cancellation: Optional[CancellationModel] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+
+    _in_flight: bool = field(init=False, repr=False, compare=False, default=False)
+    _pending: Optional[list[str]] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+    _registers: dict[str, str] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+
+    @staticmethod
+    def _header(command: str) -> str:
+        """Returns the normalized header of a SCPI command."""
+        return command.strip().split(" ")[0].lstrip(":").lower()
+
+    @staticmethod
+    def _matches(written: str, response: str) -> bool:
+        """Compares a written value with the value reported by the instrument."""
+        aliases = {"ON": "1", "OFF": "0"}
+        written = aliases.get(written.upper(), written)
+        response = response.strip().split(" ")[-1]
+        try:
+            return float(written) == float(response)
+        except ValueError:
+            written, response = written.upper(), response.upper()
+            return written.startswith(response) or response.startswith(written)
+
+    @property
+    def timeout(self) -> float:
+        return self.resource.timeout
+
+    @timeout.setter
+    def timeout(self, value: float) -> None:
+        self.resource.timeout = value
+
+    def write(self, command: str) -> None:
+        """Writes a command, dropping any shadowed value it may have changed."""
+        header = self._header(command)
+        if header in ("*rst", "*rcl"):
+            self._registers.clear()
+        else:
+            self._registers.pop(header, None)
+        self._write(command)
+
+    def _write(self, command: str) -> None:
+        """Sends the command, or queues it while a batch is open."""
+        if self._pending is not None:
+            self._pending.append(command)
+            return None
+
+        self._call("write", command)
+
+    def _call(self, method: str, command: str, **kwargs: Any) -> Any:
+        """Runs a resource call, turning calls interrupted by a cancellation into aborts."""
+        if self.cancellation is not None:
+            self.cancellation.check()
+
+        self.round_trips += 1
+        self._in_flight = True
+        start = time.monotonic()
+        trace_start = time.perf_counter() if self.tracer is not None else 0.0
+        response, error_name, error_code = None, None, None
+        try:
+            response = getattr(self.resource, method)(command, **kwargs)
+            return response
+        except VisaIOError as error:
+            error_name = type(error).__name__
+            error_code = error.abbreviation
+            if self.cancellation is not None and self.cancellation.cancelled:
+                raise AcquisitionAborted() from error
+            raise
+        finally:
+            self._in_flight = False
+            duration = time.monotonic() - start
+            if self.event_log is not None:
+                self.event_log.scpi(
+                    instrument=self.name,
+                    method=method,
+                    command=command,
+                    start=start,
+                    duration=duration,
+                    size=EventLogModel.response_size(response),
+                    error=error_name,
+                )
+            if self.tracer is not None:
+                self.tracer.complete(
+                    name=f"{self.name} {method}",
+                    category="visa",
+                    start=trace_start,
+                    duration=time.perf_counter() - trace_start,
+                    command=command,
+                )
+            if self.metrics is not None:
+                self.metrics.visa_call(
+                    instrument=self.name,
+                    command=command,
+                    duration=duration,
+                    error=error_code,
+                )
+
+    def interrupt(self) -> None:
+        """Clears the device to unblock a call that is still waiting for a response."""
+        if not self._in_flight:
+            return None
+
+        # A raw socket can't abort a pending read, a clear would only drain the
+        # response it is waiting for
+        if str(getattr(self.resource, "resource_name", "")).upper().endswith("SOCKET"):
+            return None
+
+        try:
+            self.resource.clear()
+        except (VisaIOError, OSError):
+            pass
+
+    def query(self, command: str) -> str:
+        self._flush_pending()
+        return self._call("query", command)
+
+    def query_ascii_values(self, command: str, **kwargs: Any) -> Any:
+        self._flush_pending()
+        return self._call("query_ascii_values", command, **kwargs)
+
+    def query_binary_values(self, command: str, **kwargs: Any) -> Any:
+        self._flush_pending()
+        return self._call("query_binary_values", command, **kwargs)
+
+    @contextmanager
+    def batch(self, sync: bool = False) -> Iterator["InstrumentModel"]:
+        """Collects the writes of the block and sends them as compound messages.
+
+        With sync the last message carries a trailing *OPC? query, so the block only
+        returns once the instrument has applied every command. Nested batches join the
+        outer one.
+        """
+        if self._pending is not None:
+            yield self
+            return None
+
+        self._pending = []
+        try:
+            yield self
+        except BaseException:
+            # Nothing was sent, the shadowed values can't be trusted anymore
+            self._pending = None
+            self._registers.clear()
+            raise
+
+        commands, self._pending = self._pending, None
+        self._flush(commands=commands, sync=sync)
+
+    def _flush_pending(self) -> None:
+        """Sends the queued writes of an open batch, used before any query."""
+        if self._pending:
+            commands, self._pending = self._pending, []
+            self._flush(commands=commands, sync=False)
+
+    def _flush(self, commands: list[str], sync: bool) -> None:
+        """Joins the commands with ';' into messages below the maximum length."""
+        # The *OPC? of a synced batch is not a round-trip the batching saved
+        written = len(commands)
+        if sync:
+            commands = commands + ["*OPC?"]
+
+        messages: list[str] = []
+        for command in commands:
+            # Commands in a compound message need the root prefix to be absolute
+            if not command.startswith((":", "*")):
+                command = f":{command}"
+
+            if (
+                messages
+                and len(messages[-1]) + len(command) + 1 <= self.max_message_length
+            ):
+                messages[-1] += f";{command}"
+            else:
+                messages.append(command)
+
+        if not messages:
+            return None
+
+        sent = len(messages)
+        last_message = messages.pop() if sync else None
+        try:
+            for message in messages:
+                self._call("write", message)
+            if last_message is not None:
+                self._call("query", last_message)
+        except BaseException:
+            # set() already shadowed values that may never have reached the instrument
+            self._registers.clear()
+            raise
+
+        self.saved_round_trips += max(written - sent, 0)
+
+    def changed(self, header: str, value: Any) -> bool:
+        """Checks if the value differs from the last value written for the setting."""
+        return self._registers.get(self._header(header)) != str(value)
+
+    def set(self, header: str, value: Any) -> bool:
+        """Writes the setting only if it differs from the last written value."""
+        if not self.changed(header=header, value=value):
+            return False
+
+        self._write(f"{header} {value}")
+        self._registers[self._header(header)] = str(value)
+        return True
+
+    def invalidate(self, header: Optional[str] = None) -> None:
+        """Forgets one or all of the shadowed settings."""
+        if header is None:
+            self._registers.clear()
+        else:
+            self._registers.pop(self._header(header), None)
+
+    def reset(self) -> None:
+        """Resets the instrument to its factory state and drops all shadowed values."""
+        self.write("*RST")
+
+    def verify(self) -> list[str]:
+        """Queries every shadowed setting and drops the ones that no longer match."""
+        mismatches = [
+            header
+            for header, value in list(self._registers.items())
+            if not self._matches(value, self.query(f":{header}?"))
+        ]
+        for header in mismatches:
+            self.invalidate(header=header)
+
+        return mismatches
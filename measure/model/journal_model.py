@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(slots=True)
+class JournalModel:
+    """Dataclass that keeps an append-only journal of the confirmed acquisitions.
+
+    The first line holds the parameters of the run, every following line a confirmed
+    (step, frequency) pair, and a last line marks the run as complete.
+    """
+
+    path: str = field(compare=False)
+
+    parameters: dict[str, Any] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+    done: set[tuple[int, float]] = field(
+        init=False, repr=False, compare=False, default_factory=set
+    )
+    completed: bool = field(init=False, repr=False, compare=False, default=False)
+
+    _lock: threading.Lock = field(
+        init=False, repr=False, compare=False, default_factory=threading.Lock
+    )
+
+    @classmethod
+    def create(cls, directory: str, parameters: dict[str, Any]) -> "JournalModel":
+        """Starts the journal of a new run."""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_number = parameters.get("run_number") or "run"
+
+        journal = cls(
+            path=Path(directory, f"{run_number}_{timestamp}.jsonl").as_posix()
+        )
+        journal.parameters = dict(parameters)
+        journal._append({"event": "start", "parameters": journal.parameters})
+        return journal
+
+    @classmethod
+    def load(cls, path: str) -> "JournalModel":
+        """Reads the journal of an earlier run, ignoring a torn last line."""
+        journal = cls(path=path)
+        with open(path, "r") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                if entry["event"] == "start":
+                    journal.parameters = entry["parameters"]
+                elif entry["event"] == "step":
+                    journal.done.add((entry["step"], entry["frequency"]))
+                elif entry["event"] == "complete":
+                    journal.completed = True
+
+        return journal
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        """Appends an entry and forces it to disk."""
+        with self._lock:
+            with open(self.path, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def record(self, step: int, frequency: float, filename: str) -> None:
+        """Records a confirmed acquisition."""
+        self._append(
+            {
+                "event": "step",
+                "step": step,
+                "frequency": frequency,
+                "file": filename,
+                "time": datetime.now().isoformat(),
+            }
+        )
+        self.done.add((step, frequency))
+
+    def complete(self) -> None:
+        """Marks the run as complete, nothing is left to resume."""
+        self._append({"event": "complete", "time": datetime.now().isoformat()})
+        self.completed = True
+
+    def is_done(self, step: int, frequency: float) -> bool:
+        return (step, frequency) in self.done
+
+    @property
+    def remaining(self) -> int:
+        """Number of (step, frequency) pairs of the run that are not confirmed yet."""
+        frequencies = self.parameters.get("frequencies", [])
+        steps = self.parameters.get("steps", [])
+        return sum(
+            1
+            for step in steps
+            for frequency in frequencies
+            if (step, frequency) not in self.done
+        )
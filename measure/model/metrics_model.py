@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import threading
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional
+
+from measure.model.event_log_model import EventLogModel
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass(slots=True)
+class MetricsModel:
+    """Dataclass that keeps the collection counters, gauges and latency histograms.
+
+    Rendered in the Prometheus text exposition format.
+    """
+
+    # Upper bounds of the latency histograms, in seconds
+    buckets: ClassVar[tuple[float, ...]] = (
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )
+    metrics: ClassVar[dict[str, tuple[str, str]]] = {
+        "measure_acquisitions_completed_total": (
+            "counter",
+            "Waveforms acquired since the application started.",
+        ),
+        "measure_visa_call_seconds": (
+            "histogram",
+            "Duration of the VISA calls per instrument and command.",
+        ),
+        "measure_visa_errors_total": (
+            "counter",
+            "VISA calls that failed per instrument and status code.",
+        ),
+        "measure_reconnects_total": (
+            "counter",
+            "Sessions reopened after a failed health check.",
+        ),
+        "measure_stage_seconds": (
+            "histogram",
+            "Duration of the collection stages of each acquisition.",
+        ),
+        "measure_collecting": ("gauge", "Whether a collection is running."),
+        "measure_current_repetition": (
+            "gauge",
+            "Repetition of the acquisition in progress.",
+        ),
+        "measure_current_frequency_mhz": (
+            "gauge",
+            "Frequency of the acquisition in progress.",
+        ),
+        "measure_remaining_acquisitions": (
+            "gauge",
+            "Acquisitions left in the running collection.",
+        ),
+        "measure_writer_queue_depth": (
+            "gauge",
+            "Waveforms waiting for the writer thread.",
+        ),
+    }
+
+    _values: dict[tuple[str, _Labels], float] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+    _histograms: dict[tuple[str, _Labels], list[float]] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+    _lock: threading.Lock = field(
+        init=False, repr=False, compare=False, default_factory=threading.Lock
+    )
+
+    @staticmethod
+    def _labels(labels: dict[str, object]) -> _Labels:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def increment(self, name: str, value: float = 1.0, **labels: object) -> None:
+        """Adds the value to a counter."""
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: object) -> None:
+        """Sets the value of a gauge."""
+        with self._lock:
+            self._values[(name, self._labels(labels))] = float(value)
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        """Adds an observation to a histogram."""
+        key = (name, self._labels(labels))
+        with self._lock:
+            # Bucket counts followed by the sum and the count of the observations
+            histogram = self._histograms.setdefault(
+                key, [0.0] * (len(self.buckets) + 2)
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[index] += 1.0
+            histogram[-2] += value
+            histogram[-1] += 1.0
+
+    def visa_call(
+        self,
+        instrument: str,
+        command: str,
+        duration: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """Records the latency and the error of one instrument call.
+
+        The error is the VISA status abbreviation, e.g. VI_ERROR_TMO.
+        """
+        self.observe(
+            "measure_visa_call_seconds",
+            duration,
+            instrument=instrument,
+            command=EventLogModel.command_key(command),
+        )
+        if error is not None:
+            self.increment(
+                "measure_visa_errors_total", instrument=instrument, error=error
+            )
+
+    @staticmethod
+    def _format(labels: _Labels) -> str:
+        if not labels:
+            return ""
+        escaped = (
+            (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in labels
+        )
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            values = dict(self._values)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+
+        lines: list[str] = []
+        for name, (kind, description) in self.metrics.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{self._format(labels)} {value:g}")
+                continue
+
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(self.buckets, histogram):
+                    bucket = self._format(labels + (("le", f"{bound:g}"),))
+                    lines.append(f"{name}_bucket{bucket} {count:g}")
+                bucket = self._format(labels + (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{bucket} {histogram[-1]:g}")
+                lines.append(f"{name}_sum{self._format(labels)} {histogram[-2]:.9g}")
+                lines.append(f"{name}_count{self._format(labels)} {histogram[-1]:g}")
+
+        return "\n".join(lines) + "\n"
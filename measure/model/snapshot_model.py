@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from measure.model.setup_model import SetupModel
+from measure.model.experiment_model import ExperimentModel
+
+
+@dataclass(frozen=True, slots=True)
+class ExperimentSnapshotModel:
+    """Dataclass that holds the setup and experiment values of a single collection."""
+
+    run_number: str = field(compare=True)
+    basedir: str = field(compare=True)
+    mso: str = field(compare=False)
+    afg: str = field(compare=False)
+    vpp: float = field(compare=True)
+    frequencies: tuple[float, ...] = field(compare=True)
+    threshold: float = field(compare=True)
+    reset_frequency: float = field(compare=False)
+    repetitions: int = field(compare=True)
+    file_number: int = field(compare=True)
+    scan: str = field(compare=True)
+    load: float = field(compare=True)
+    temperature: float = field(compare=True)
+    storage: str = field(compare=True)
+    acquisition: str = field(compare=True)
+
+    @classmethod
+    def capture(
+        cls, setup_model: SetupModel, experiment_model: ExperimentModel, basedir: str
+    ) -> "ExperimentSnapshotModel":
+        """Copies the current values, must run on the thread that edits the models."""
+        return cls(
+            run_number=setup_model.run_number,
+            basedir=basedir,
+            mso=setup_model.mso,
+            afg=setup_model.afg,
+            vpp=setup_model.vpp,
+            frequencies=tuple(experiment_model.frequencies),
+            threshold=experiment_model.threshold,
+            reset_frequency=experiment_model.reset_frequency,
+            repetitions=experiment_model.repetitions,
+            file_number=experiment_model.file_number,
+            scan=experiment_model.scan,
+            load=experiment_model.load,
+            temperature=experiment_model.temperature,
+            storage=experiment_model.storage,
+            acquisition=experiment_model.acquisition,
+        )
+
+    @property
+    def steps(self) -> list[int]:
+        """Returns the file numbers collected, one sweep covers FastFrame/averaging."""
+        if self.acquisition == "standard":
+            return list(range(self.file_number, self.file_number + self.repetitions))
+        return [self.file_number]
+
+    def run_parameters(self) -> dict[str, Any]:
+        """Returns the parameters that define the acquisitions of a run."""
+        return {
+            "run_number": self.run_number,
+            "basedir": self.basedir,
+            "vpp": self.vpp,
+            "frequencies": list(self.frequencies),
+            "threshold": self.threshold,
+            "repetitions": self.repetitions,
+            "file_number": self.file_number,
+            "scan": self.scan,
+            "load": self.load,
+            "temperature": self.temperature,
+            "acquisition": self.acquisition,
+            "storage": self.storage,
+            "steps": self.steps,
+        }
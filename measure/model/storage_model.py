@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import numpy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from measure.model.waveform_model import WaveformModel
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+@dataclass(slots=True)
+class Hdf5StorageModel:
+    """Dataclass that appends the waveforms of a run to a single HDF5 file.
+
+    Each collection gets a group named after its load and temperature, with one
+    subgroup per frequency holding extendable, chunked and compressed datasets.
+    """
+
+    path: str = field(compare=False)
+    collection: str = field(compare=False)
+    attributes: dict[str, Any] = field(repr=False, compare=False, default_factory=dict)
+    compression: str = field(repr=False, compare=False, default="gzip")
+
+    _file: Any = field(init=False, repr=False, compare=False, default=None)
+
+    @staticmethod
+    def available() -> bool:
+        """Checks if the optional h5py dependency is installed."""
+        return h5py is not None
+
+    def open(self) -> None:
+        """Opens, or creates, the run file and the group of the collection."""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = h5py.File(self.path, "a")
+
+        group = self._file.require_group(self.collection)
+        group.attrs.update(self.attributes)
+
+    def append(self, waveform: WaveformModel) -> None:
+        """Appends every frame of the waveform to the datasets of its frequency."""
+        frames = waveform.frames
+        group = self._frequency_group(waveform=waveform, samples=frames.shape[1])
+
+        volts, steps, acquired = group["volts"], group["steps"], group["acquired"]
+        timestamps = group["timestamps"]
+        # Checked before resizing, a failed assignment would leave empty rows behind
+        if frames.shape[1] != volts.shape[1]:
+            raise ValueError(
+                f"{frames.shape[1]} samples don't match the {volts.shape[1]} samples "
+                f"of {volts.name}, use a new run number for a new record length"
+            )
+
+        start = volts.shape[0]
+        for dataset in (volts, steps, acquired, timestamps):
+            dataset.resize(start + frames.shape[0], axis=0)
+
+        volts[start:] = frames
+        steps[start:] = waveform.step + numpy.arange(frames.shape[0])
+        acquired[start:] = waveform.acquired
+        # Only FastFrame waveforms carry the trigger timestamp of every frame
+        frame_timestamps = list(waveform.timestamps[: frames.shape[0]])
+        timestamps[start:] = frame_timestamps + [""] * (
+            frames.shape[0] - len(frame_timestamps)
+        )
+
+        # Keep the file readable if the application stops mid-run
+        self._file.flush()
+
+    def _frequency_group(self, waveform: WaveformModel, samples: int) -> Any:
+        """Returns the group of the waveform frequency, creating its datasets once."""
+        name = f"{self.collection}/{waveform.frequency}MHz"
+        if name in self._file:
+            group = self._file[name]
+            # Run files written before the timestamps were stored
+            if "timestamps" not in group:
+                self._timestamps_dataset(group=group, rows=group["volts"].shape[0])
+            return group
+
+        group = self._file.create_group(name)
+        group.attrs["frequency"] = waveform.frequency
+        group.attrs.update(waveform.preamble.as_dict())
+
+        group.create_dataset(
+            "volts",
+            shape=(0, samples),
+            maxshape=(None, samples),
+            chunks=(1, samples),
+            dtype=numpy.float32,
+            compression=self.compression,
+            shuffle=True,
+        )
+        group.create_dataset(
+            "steps", shape=(0,), maxshape=(None,), chunks=True, dtype=numpy.int64
+        )
+        group.create_dataset(
+            "acquired", shape=(0,), maxshape=(None,), chunks=True, dtype=numpy.float64
+        )
+        self._timestamps_dataset(group=group, rows=0)
+        return group
+
+    @staticmethod
+    def _timestamps_dataset(group: Any, rows: int) -> None:
+        """Creates the dataset with the trigger timestamp of every frame."""
+        group.create_dataset(
+            "timestamps",
+            shape=(rows,),
+            maxshape=(None,),
+            chunks=True,
+            dtype=h5py.string_dtype(),
+        )
+
+    def close(self) -> None:
+        """Closes the run file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def read(
+        path: str,
+        collection: str,
+        frequency: float,
+        rows: Optional[slice] = None,
+    ) -> numpy.ndarray:
+        """Reads a slice of the stored waveforms, only touching the needed chunks."""
+        with h5py.File(path, "r") as file:
+            return file[f"{collection}/{frequency}MHz/volts"][
+                rows if rows is not None else slice(None)
+            ]
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterator
+
+from measure.model.snapshot_model import ExperimentSnapshotModel
+
+
+@dataclass(frozen=True, slots=True)
+class SweepStepModel:
+    """Dataclass that holds everything needed to acquire one waveform of a sweep."""
+
+    step: int = field(compare=True)
+    frequency: float = field(compare=True)
+    number_of_cycles: int = field(compare=False)
+    shape: str = field(compare=False)
+    vpp: float = field(compare=False)
+    afg_settings: tuple[tuple[str, Any], ...] = field(repr=False, compare=False)
+    filename: str = field(compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class SweepPlanModel:
+    """Dataclass that holds the sweeps of a collection, compiled once per run."""
+
+    sweeps: tuple[tuple[SweepStepModel, ...], ...] = field(compare=False)
+
+    def __len__(self) -> int:
+        return sum(len(sweep) for sweep in self.sweeps)
+
+    def __iter__(self) -> Iterator[SweepStepModel]:
+        for sweep in self.sweeps:
+            yield from sweep
+
+    @classmethod
+    def compile(cls, snapshot: ExperimentSnapshotModel) -> "SweepPlanModel":
+        """Creates the plan from the setup and experiment values of a collection."""
+        vpp = snapshot.vpp
+        threshold = snapshot.threshold
+        repetitions = snapshot.repetitions
+        frequencies = snapshot.frequencies
+        averaged = snapshot.acquisition == "average"
+
+        # Run files share the timestamp of the moment the plan was compiled
+        timestamp = ""
+        if repetitions == 1 or averaged:
+            timestamp = "_" + datetime.now().strftime("%m.%d.%Y_%H.%M.%S")
+
+        prefix = (
+            snapshot.basedir
+            + f"{snapshot.run_number}_{snapshot.load}ton_{snapshot.temperature}K_"
+        )
+        if averaged:
+            suffix = f"_avg{repetitions}.csv"
+        elif repetitions > 1:
+            suffix = f"_{snapshot.scan}{{step}}.csv"
+        else:
+            suffix = ".csv"
+
+        signals = {
+            frequency: cls._signal(frequency=frequency, threshold=threshold, vpp=vpp)
+            for frequency in frequencies
+        }
+
+        return cls(
+            sweeps=tuple(
+                tuple(
+                    SweepStepModel(
+                        step=step,
+                        frequency=frequency,
+                        number_of_cycles=signals[frequency][0],
+                        shape=signals[frequency][1],
+                        vpp=vpp,
+                        afg_settings=signals[frequency][2],
+                        filename=prefix
+                        + f"{frequency}MHz{timestamp}"
+                        + suffix.format(step=step),
+                    )
+                    for frequency in frequencies
+                )
+                for step in snapshot.steps
+            )
+        )
+
+    @staticmethod
+    def _signal(
+        frequency: float, threshold: float, vpp: float
+    ) -> tuple[int, str, tuple[tuple[str, Any], ...]]:
+        """Returns the cycles, shape and afg settings used for the given frequency."""
+        if frequency > threshold:
+            number_of_cycles = 2
+            shape = "user1"
+            afg_frequency = frequency * 1.0e6 / 2.0
+        else:
+            number_of_cycles = 1
+            shape = "sin"
+            afg_frequency = frequency * 1.0e6
+
+        return (
+            number_of_cycles,
+            shape,
+            (
+                (":source1:burst:ncycles", 1),
+                (":source1:function:shape", shape),
+                (":source1:frequency", afg_frequency),
+                (":source1:voltage", vpp),
+                (":source1:phase", "0.0e0"),
+                (":source1:voltage:offset", "0.0e0"),
+                (":output1:state", "on"),
+            ),
+        )
+
+    def collisions(self) -> list[str]:
+        """Returns the filenames that more than one step of the plan would write."""
+        counts = Counter(step.filename for step in self)
+        return sorted(filename for filename, count in counts.items() if count > 1)
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional
+from qtpy.QtCore import QSettings
+
+
+@dataclass(frozen=False, slots=True)
+class TimingModel:
+    """Dataclass that learns the cost of each collection stage from the last runs."""
+
+    stages: ClassVar[tuple[str, ...]] = ("configure", "arm", "acquire", "save")
+    smoothing: ClassVar[float] = 0.2
+
+    settings: QSettings = field(init=True, repr=False, compare=False)
+
+    _durations: dict[str, float] = field(
+        init=False, repr=False, compare=False, default_factory=lambda: {}
+    )
+
+    def __post_init__(self) -> None:
+        # Stage durations are kept per acquisition mode, averaging acquires many
+        # waveforms per step
+        for acquisition in ("standard", "fastframe", "average"):
+            for stage in self.stages:
+                key = f"timing/{acquisition}/{stage}"
+                value = self.settings.value(key)
+                if value is not None:
+                    self._durations[key] = float(value)
+
+    def update(self, acquisition: str, durations: dict[str, float]) -> None:
+        """Blends the measured stage durations of one acquisition into the model."""
+        for stage, duration in durations.items():
+            if stage not in self.stages:
+                continue
+            key = f"timing/{acquisition}/{stage}"
+            previous = self._durations.get(key)
+            if previous is None:
+                self._durations[key] = duration
+            else:
+                self._durations[key] = previous + self.smoothing * (duration - previous)
+
+    def save(self) -> None:
+        """Stores the learned durations, used once a collection finished."""
+        for key, duration in self._durations.items():
+            self.settings.setValue(key, duration)
+
+    def step_duration(self, acquisition: str) -> Optional[float]:
+        """Returns the expected duration of one acquisition, if already learned."""
+        durations = [
+            self._durations.get(f"timing/{acquisition}/{stage}")
+            for stage in self.stages
+        ]
+        if None in durations:
+            return None
+
+        # The afg is configured for the next frequency while the waveform is saved
+        configure, arm, acquire, save = durations
+        return arm + acquire + max(configure, save)
+
+    def estimate(self, acquisition: str, acquisitions: int) -> Optional[float]:
+        """Returns the expected duration in seconds of the given acquisitions."""
+        step_duration = self.step_duration(acquisition=acquisition)
+        if step_duration is None:
+            return None
+
+        return step_duration * acquisitions
@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+
+@dataclass(slots=True)
+class TracerModel:
+    """Dataclass that records spans of all threads as Chrome trace events.
+
+    The written JSON opens in chrome://tracing and in the Perfetto UI.
+    """
+
+    directory: str = field(compare=False)
+
+    _events: list[dict[str, Any]] = field(
+        init=False, repr=False, compare=False, default_factory=list
+    )
+    _threads: set[int] = field(
+        init=False, repr=False, compare=False, default_factory=set
+    )
+    _origin: float = field(
+        init=False, repr=False, compare=False, default_factory=time.perf_counter
+    )
+    _lock: threading.Lock = field(
+        init=False, repr=False, compare=False, default_factory=threading.Lock
+    )
+
+    def start(self) -> None:
+        """Drops the events of the previous run."""
+        with self._lock:
+            self._events.clear()
+            self._threads.clear()
+            self._origin = time.perf_counter()
+
+    def _append(self, event: dict[str, Any]) -> None:
+        """Adds an event of the current thread, naming the thread on its first event."""
+        thread = threading.current_thread()
+        event.update(pid=os.getpid(), tid=thread.ident)
+        with self._lock:
+            if thread.ident not in self._threads:
+                self._threads.add(thread.ident)
+                self._events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": os.getpid(),
+                        "tid": thread.ident,
+                        "args": {"name": thread.name},
+                    }
+                )
+            self._events.append(event)
+
+    def complete(
+        self, name: str, category: str, start: float, duration: float, **args: Any
+    ) -> None:
+        """Records a span that was timed with time.perf_counter."""
+        self._append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._origin) * 1.0e6,
+                "dur": duration * 1.0e6,
+                "args": args,
+            }
+        )
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[None]:
+        """Records the duration of the block as a span of the current thread."""
+        start = time.perf_counter()
+        try:
+            yield None
+        finally:
+            self.complete(
+                name=name,
+                category=category,
+                start=start,
+                duration=time.perf_counter() - start,
+                **args,
+            )
+
+    def instant(self, name: str, category: str, **args: Any) -> None:
+        """Records a point in time, e.g. the emission of a signal."""
+        self._append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "i",
+                "s": "t",
+                "ts": (time.perf_counter() - self._origin) * 1.0e6,
+                "args": args,
+            }
+        )
+
+    def write(self, name: str) -> str:
+        """Writes the recorded events as a trace file and returns its path."""
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = Path(self.directory, f"{name}_{timestamp}.json").as_posix()
+
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+        return path
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import numpy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ClassVar
+
+
+@dataclass(frozen=True, slots=True)
+class WaveformPreambleModel:
+    """Dataclass that holds the WFMOutpre scaling values of a transferred waveform."""
+
+    query: ClassVar[str] = ":wfmoutpre:nr_pt?;xincr?;xzero?;pt_off?;ymult?;yoff?;yzero?"
+
+    points: int = field(compare=False)
+    x_increment: float = field(compare=False)
+    x_zero: float = field(compare=False)
+    pt_offset: float = field(compare=False)
+    y_multiplier: float = field(compare=False)
+    y_offset: float = field(compare=False)
+    y_zero: float = field(compare=False)
+
+    @classmethod
+    def from_response(cls, response: str) -> "WaveformPreambleModel":
+        """Creates the preamble from the response of the preamble query."""
+        values = [value.split(" ")[-1] for value in response.strip().split(";")]
+        return cls(int(float(values[0])), *[float(value) for value in values[1:]])
+
+    def scale(self, raw: numpy.ndarray, out: numpy.ndarray) -> numpy.ndarray:
+        """Converts the raw digitizer levels to volts, in place on the given buffer."""
+        volts = out[: raw.size]
+        numpy.subtract(raw, self.y_offset, out=volts)
+        volts *= self.y_multiplier
+        volts += self.y_zero
+        return volts
+
+    def time_axis(self, points: int) -> numpy.ndarray:
+        """Returns the time of each sample in seconds."""
+        return self.x_zero + (numpy.arange(points) - self.pt_offset) * self.x_increment
+
+    def as_dict(self) -> dict[str, float]:
+        """Returns the preamble as a dictionary, used for file headers/attributes."""
+        return {
+            "points": self.points,
+            "x_increment": self.x_increment,
+            "x_zero": self.x_zero,
+            "pt_offset": self.pt_offset,
+            "y_multiplier": self.y_multiplier,
+            "y_offset": self.y_offset,
+            "y_zero": self.y_zero,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class WaveformModel:
+    """Dataclass that holds a waveform transferred to the host.
+
+    FastFrame waveforms hold one row of volts per frame, with the frame timestamps.
+    """
+
+    filename: str = field(compare=False)
+    frequency: float = field(compare=False)
+    preamble: WaveformPreambleModel = field(repr=False, compare=False)
+    volts: numpy.ndarray = field(repr=False, compare=False)
+    timestamps: tuple[str, ...] = field(repr=False, compare=False, default=())
+    step: int = field(compare=False, default=1)
+    acquired: float = field(repr=False, compare=False, default=0.0)
+
+    @property
+    def frames(self) -> numpy.ndarray:
+        """Returns the volts as a frames x samples array."""
+        return numpy.atleast_2d(self.volts)
+
+    def save_csv(self) -> None:
+        """Writes the waveform and its scaling preamble to a local csv file."""
+        path = Path(self.filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        frames = self.frames
+        header = "\n".join(
+            f"{key},{value}" for key, value in self.preamble.as_dict().items()
+        )
+        header += f"\nfrequency,{self.frequency}"
+        if self.timestamps:
+            header += "\ntimestamps," + ",".join(self.timestamps)
+
+        columns = (
+            ["CH1"]
+            if frames.shape[0] == 1
+            else [f"CH1_{frame}" for frame in range(1, frames.shape[0] + 1)]
+        )
+        data = numpy.column_stack((self.preamble.time_axis(frames.shape[1]), frames.T))
+        numpy.savetxt(
+            path,
+            data,
+            delimiter=",",
+            fmt="%.9e",
+            header=f"{header}\nTIME,{','.join(columns)}",
+            comments="",
+        )
@@ -18,20 +18,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-from qtpy.QtCore import QThread
-from typing import Any, Callable
-
-
-class QtWorkerModel(QThread):
-    """
-    The worker class that's been used for threading.
-    """
-
-    def __init__(self, method: Callable, args: Any) -> None:
-        super(QtWorkerModel, self).__init__()
-
-        self._method = method
-        self._args = args
-
-    def run(self) -> None:
-        self._method(*self._args)
+from measure.simulator.simulator_config_model import SimulatorConfigModel
+from measure.simulator.instrument_simulator import InstrumentSimulator, SimulatorFault
+from measure.simulator.afg_simulator import AfgSimulator
+from measure.simulator.mso_simulator import MsoSimulator
+from measure.simulator.scpi_server import ScpiServer
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+"""Serves a simulated MSO and AFG on local SCPI sockets.
+
+Usage: python -m measure.simulator [--mso-port 4000] [--afg-port 4001]
+
+Enter the printed VISA resource names as the MSO and AFG addresses of U-Measure.
+"""
+
+import argparse
+import time
+from typing import Optional
+
+from measure.simulator import (
+    AfgSimulator,
+    MsoSimulator,
+    ScpiServer,
+    SimulatorConfigModel,
+)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m measure.simulator", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--mso-port", type=int, default=4000)
+    parser.add_argument("--afg-port", type=int, default=4001)
+    parser.add_argument("--latency", type=float, default=0.001, help="s per command")
+    parser.add_argument(
+        "--acquisition-time", type=float, default=0.05, help="s per acquired waveform"
+    )
+    parser.add_argument("--save-time", type=float, default=0.2, help="s per saved file")
+    parser.add_argument("--record-length", type=int, default=10000)
+    parser.add_argument("--noise", type=float, default=0.005, help="V rms")
+    parser.add_argument(
+        "--fault-rate", type=float, default=0.0, help="probability per message"
+    )
+    parser.add_argument(
+        "--faults",
+        default="timeout",
+        help="comma separated fault kinds: timeout, disconnect, slow",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args(argv)
+
+    config = SimulatorConfigModel(
+        latency=arguments.latency,
+        acquisition_time=arguments.acquisition_time,
+        save_time=arguments.save_time,
+        record_length=arguments.record_length,
+        noise=arguments.noise,
+        fault_rate=arguments.fault_rate,
+        faults=tuple(fault.strip() for fault in arguments.faults.split(",")),
+        seed=arguments.seed,
+    )
+    afg = AfgSimulator(config=config)
+    mso = MsoSimulator(config=config, afg=afg)
+
+    servers = [
+        ScpiServer(simulator=mso, host=arguments.host, port=arguments.mso_port),
+        ScpiServer(simulator=afg, host=arguments.host, port=arguments.afg_port),
+    ]
+    for name, server in zip(("MSO", "AFG"), servers):
+        server.start()
+        print(f"{name} simulator at {server.resource_name}")
+
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+from measure.simulator.instrument_simulator import InstrumentSimulator
+
+
+class AfgSimulator(InstrumentSimulator):
+    """Simulates the AFG burst settings that define the excitation of the sample."""
+
+    identity: str = "TEKTRONIX,AFG31052,SIMULATED,SCPI:99.0 FV:1.0.0"
+    defaults: dict[str, str] = {
+        "source1:burst:ncycles": "1",
+        "source1:function:shape": "SIN",
+        "source1:frequency": "1.0e6",
+        "source1:voltage": "1.0",
+        "source1:phase": "0.0e0",
+        "source1:voltage:offset": "0.0e0",
+        "output1:state": "0",
+    }
+
+    @property
+    def excitation(self) -> tuple[float, float, float]:
+        """Returns the frequency, cycles and amplitude seen on the mso channel."""
+        with self.lock:
+            if self.settings["output1:state"].lower() not in ("1", "on"):
+                return 0.0, 0.0, 0.0
+
+            frequency = float(self.settings["source1:frequency"])
+            cycles = float(self.settings["source1:burst:ncycles"])
+            # The user1 waveform holds two cycles of the doubled frequency
+            if self.settings["source1:function:shape"].lower() == "user1":
+                frequency *= 2.0
+                cycles *= 2.0
+            return frequency, cycles, float(self.settings["source1:voltage"]) / 2.0
@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import threading
+import time
+import numpy
+from typing import Optional, Union
+
+from measure.simulator.simulator_config_model import SimulatorConfigModel
+
+
+class SimulatorFault(Exception):
+    """Raised to inject a fault, the server drops the response or the connection."""
+
+    def __init__(self, kind: str) -> None:
+        super(SimulatorFault, self).__init__(kind)
+        self.kind = kind
+
+
+class InstrumentSimulator:
+    """Simulates the SCPI parser, status registers and settings of an instrument."""
+
+    identity: str = "SIMULATED,INSTRUMENT,0,0"
+    defaults: dict[str, str] = {}
+
+    # Event status register bits
+    operation_complete: int = 1
+    command_error: int = 32
+
+    def __init__(self, config: SimulatorConfigModel) -> None:
+        self.config = config
+        self.settings: dict[str, str] = dict(self.defaults)
+        self.lock = threading.Lock()
+        self.random = numpy.random.default_rng(config.seed)
+
+        self._esr = 0
+        self._opc_requested = False
+        self._busy_until = 0.0
+
+    @staticmethod
+    def header(command: str) -> str:
+        """Returns the normalized header of a SCPI command, without the query mark."""
+        return command.strip().split(" ")[0].lstrip(":").rstrip("?").lower()
+
+    def handle(self, message: str) -> Optional[Union[str, bytes]]:
+        """Runs a, possibly compound, message and returns the joined query responses."""
+        with self.lock:
+            self._inject_fault()
+
+            responses: list[Union[str, bytes]] = []
+            path = ""
+            for command in message.strip().split(";"):
+                command = command.strip()
+                if not command:
+                    continue
+
+                # Relative headers continue in the subsystem of the previous command
+                if not command.startswith((":", "*")) and path:
+                    command = f"{path}:{command}"
+                elif not command.startswith("*"):
+                    path = self.header(command).rsplit(":", 1)[0]
+
+                header = self.header(command)
+                time.sleep(self.config.command_time(header))
+
+                response = self._command(command=command, header=header)
+                if response is not None:
+                    responses.append(response)
+
+        if not responses:
+            return None
+        if any(isinstance(response, bytes) for response in responses):
+            return responses[-1]
+        return ";".join(responses)
+
+    def _inject_fault(self) -> None:
+        """Raises one of the configured faults at the configured rate."""
+        if self.config.fault_rate <= 0.0:
+            return None
+
+        if self.random.random() < self.config.fault_rate:
+            kind = str(self.random.choice(self.config.faults))
+            if kind == "slow":
+                time.sleep(self.config.latency * 50.0)
+                return None
+            raise SimulatorFault(kind=kind)
+
+    def _command(self, command: str, header: str) -> Optional[Union[str, bytes]]:
+        """Runs a single command, unknown queries set the command error bit."""
+        query = command.split(" ")[0].endswith("?")
+        argument = command.split(" ", 1)[1].strip() if " " in command else ""
+
+        if header == "*idn" and query:
+            return self.identity
+        if header == "*opc":
+            if query:
+                self._wait_until_idle()
+                return "1"
+            self._opc_requested = True
+            return None
+        if header == "*esr" and query:
+            if self._opc_requested and time.monotonic() >= self._busy_until:
+                self._esr |= self.operation_complete
+                self._opc_requested = False
+            esr, self._esr = self._esr, 0
+            return str(esr)
+        if header == "*cls":
+            self._esr = 0
+            self._opc_requested = False
+            return None
+        if header == "*rst":
+            self.settings = dict(self.defaults)
+            return None
+
+        response = self.command(header=header, argument=argument, query=query)
+        if response is not NotImplemented:
+            return response
+
+        if query:
+            if header in self.settings:
+                return self.settings[header]
+            self._esr |= self.command_error
+            raise SimulatorFault(kind="timeout")
+
+        self.settings[header] = argument
+        return None
+
+    def command(
+        self, header: str, argument: str, query: bool
+    ) -> Optional[Union[str, bytes]]:
+        """Handles the instrument commands, NotImplemented for the plain settings."""
+        return NotImplemented
+
+    def _wait_until_idle(self) -> None:
+        """Blocks until the pending operations are complete, used by *OPC?."""
+        remaining = self._busy_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def busy_for(self, duration: float) -> None:
+        """Queues an operation that completes after the pending ones."""
+        self._busy_until = max(self._busy_until, time.monotonic()) + duration
+
+    @property
+    def busy(self) -> bool:
+        return time.monotonic() < self._busy_until
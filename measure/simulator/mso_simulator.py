@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import time
+import numpy
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+from measure.simulator.afg_simulator import AfgSimulator
+from measure.simulator.instrument_simulator import InstrumentSimulator
+from measure.simulator.simulator_config_model import SimulatorConfigModel
+
+
+class MsoSimulator(InstrumentSimulator):
+    """Simulates the MSO acquisition, save and curve transfer commands."""
+
+    identity: str = "TEKTRONIX,MSO64,SIMULATED,CF:91.1CT FV:1.0.0"
+    defaults: dict[str, str] = {
+        "acquire:mode": "SAMPLE",
+        "acquire:numavg": "16",
+        "acquire:stopafter": "RUNSTOP",
+        "horizontal:fastframe:state": "0",
+        "horizontal:fastframe:count": "1",
+        "data:source": "CH1",
+        "data:encdg": "RIBINARY",
+        "data:width": "1",
+        "data:start": "1",
+        "data:stop": "10000",
+        "data:framestart": "1",
+        "data:framestop": "1",
+        "save:waveform:fileformat": "AUTO",
+    }
+
+    def __init__(self, config: SimulatorConfigModel, afg: AfgSimulator) -> None:
+        super(MsoSimulator, self).__init__(config=config)
+        self.afg = afg
+        self.settings["data:stop"] = str(config.record_length)
+
+        self._running = True
+        self._acquired = 0.0
+        self._trigger_times: list[datetime] = []
+        self._excitation: tuple[float, float, float] = afg.excitation
+        self._y_multiplier = 1.0e-4
+
+    def command(
+        self, header: str, argument: str, query: bool
+    ) -> Optional[Union[str, bytes]]:
+        if header == "acquire:state":
+            if query:
+                return "1" if self._acquiring else "0"
+            self._acquire(run=argument.lower() in ("run", "on", "1"))
+            return None
+        if header == "busy" and query:
+            return "1" if self._acquiring else "0"
+        if header == "save:waveform" and not query:
+            self.busy_for(self.config.save_time)
+            return None
+        if header == "horizontal:recordlength" and query:
+            return str(self.config.record_length)
+        if header.startswith("wfmoutpre:") and query:
+            return self._preamble(header.split(":", 1)[1])
+        if header == "curve" and query:
+            return self._curve()
+        if header == "horizontal:fastframe:timestamp:all:ch1" and query:
+            return ",".join(
+                f'"{timestamp.strftime("%d %b %Y %H:%M:%S.%f")}"'
+                for timestamp in self._trigger_times
+            )
+        return NotImplemented
+
+    def _acquire(self, run: bool) -> None:
+        """Starts or stops the acquisition, sequences complete on their own."""
+        if not run:
+            self._running = False
+            return None
+
+        self._running = True
+        # The acquired record holds the excitation that triggered it, the afg may
+        # already be configured for the next frequency when the curve is read
+        self._excitation = self.afg.excitation
+        if self._sequence:
+            duration = self.config.acquisition_time * self._waveforms
+            self.busy_for(duration)
+            self._acquired = self._busy_until
+
+            start = datetime.now()
+            self._trigger_times = [
+                start + timedelta(seconds=self.config.acquisition_time * frame)
+                for frame in range(self._frames)
+            ]
+
+    @property
+    def _sequence(self) -> bool:
+        return self.settings["acquire:stopafter"].lower().startswith("seq")
+
+    @property
+    def _acquiring(self) -> bool:
+        if self._sequence:
+            return self._running and time.monotonic() < self._acquired
+        return self._running
+
+    @property
+    def _frames(self) -> int:
+        if self.settings["horizontal:fastframe:state"].lower() in ("1", "on"):
+            return max(int(float(self.settings["horizontal:fastframe:count"])), 1)
+        return 1
+
+    @property
+    def _averages(self) -> int:
+        if self.settings["acquire:mode"].lower().startswith("ave"):
+            return max(int(float(self.settings["acquire:numavg"])), 1)
+        return 1
+
+    @property
+    def _waveforms(self) -> int:
+        """Number of triggers needed to complete one sequence."""
+        return self._frames * self._averages
+
+    def _points(self) -> int:
+        start = int(float(self.settings["data:start"]))
+        stop = min(int(float(self.settings["data:stop"])), self.config.record_length)
+        return max(stop - start + 1, 0)
+
+    def _preamble(self, field: str) -> str:
+        """Returns one of the WFMOutpre values of the curve transfer."""
+        values = {
+            "nr_pt": str(self._points()),
+            "xincr": f"{self.config.sample_interval:.6e}",
+            "xzero": f"{-self.config.echo_delay / 4.0:.6e}",
+            "pt_off": "0",
+            "ymult": f"{self._y_multiplier:.6e}",
+            "yoff": "0.0e0",
+            "yzero": "0.0e0",
+        }
+        return values.get(field, "0")
+
+    def _curve(self) -> bytes:
+        """Returns the selected frames as an IEEE 488.2 definite length block."""
+        if self._running and not self._sequence:
+            # A free running acquisition follows the afg
+            self._excitation = self.afg.excitation
+
+        first = int(float(self.settings["data:framestart"]))
+        last = min(int(float(self.settings["data:framestop"])), self._frames)
+        frames = max(last - first + 1, 1) if self._frames > 1 else 1
+
+        start = int(float(self.settings["data:start"])) - 1
+        volts = numpy.concatenate(
+            [self._waveform()[start : start + self._points()] for _ in range(frames)]
+        )
+        width = int(float(self.settings["data:width"]))
+        datatype = ">i2" if width == 2 else "i1"
+        limit = 32767 if width == 2 else 127
+        raw = numpy.clip(
+            numpy.round(volts / self._y_multiplier), -limit - 1, limit
+        ).astype(datatype)
+
+        data = raw.tobytes()
+        length = str(len(data))
+        return f"#{len(length)}{length}".encode("ascii") + data
+
+    def _waveform(self) -> numpy.ndarray:
+        """Generates the excitation burst of the afg followed by its echoes."""
+        samples = numpy.arange(self.config.record_length) * self.config.sample_interval
+        samples -= self.config.echo_delay / 4.0
+
+        frequency, cycles, amplitude = self._excitation
+        volts = numpy.zeros(self.config.record_length)
+        if frequency > 0.0 and amplitude > 0.0:
+            duration = cycles / frequency
+            for echo in range(4):
+                delay = echo * self.config.echo_delay
+                gain = 0.1 * self.config.echo_attenuation**echo
+                window = (samples >= delay) & (samples < delay + duration)
+                volts[window] += (
+                    gain
+                    * amplitude
+                    * numpy.sin(2.0 * numpy.pi * frequency * (samples[window] - delay))
+                )
+
+        # Averaging lowers the noise with the square root of the averages
+        noise = self.config.noise / numpy.sqrt(self._averages)
+        return volts + self.random.normal(0.0, noise, self.config.record_length)
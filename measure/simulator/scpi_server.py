@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import socket
+import socketserver
+import threading
+from typing import Optional
+
+from measure.simulator.instrument_simulator import InstrumentSimulator, SimulatorFault
+
+
+class ScpiServer(socketserver.ThreadingTCPServer):
+    """Serves a simulated instrument as a raw SCPI socket, as VISA SOCKET resources."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, simulator: InstrumentSimulator, host: str, port: int) -> None:
+        super(ScpiServer, self).__init__((host, port), _ScpiHandler)
+        self.simulator = simulator
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def resource_name(self) -> str:
+        """Returns the VISA resource name to enter as the instrument address."""
+        host, port = self.server_address[:2]
+        return f"TCPIP::{host}::{port}::SOCKET"
+
+    def start(self) -> None:
+        """Serves the instrument on a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever,
+            name=f"scpi-{self.server_address[1]}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _ScpiHandler(socketserver.StreamRequestHandler):
+    """Reads newline terminated messages and writes the newline terminated responses."""
+
+    server: ScpiServer
+
+    def setup(self) -> None:
+        super(_ScpiHandler, self).setup()
+        # Small responses must not wait for the delayed acknowledgement of the client
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self) -> None:
+        while True:
+            # Acknowledge writes right away, otherwise the Nagle algorithm of the client
+            # holds back the next message until the delayed acknowledgement (Linux only)
+            if hasattr(socket, "TCP_QUICKACK"):
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+            line = self.rfile.readline()
+            if not line:
+                return None
+
+            message = line.decode("ascii", errors="replace").strip()
+            if not message:
+                continue
+
+            try:
+                response = self.server.simulator.handle(message)
+            except SimulatorFault as fault:
+                if fault.kind == "disconnect":
+                    return None
+                # A timeout fault never answers, the client runs into its timeout
+                continue
+
+            if response is None:
+                continue
+            if isinstance(response, str):
+                response = response.encode("ascii")
+            self.wfile.write(response + b"\n")
+            self.wfile.flush()
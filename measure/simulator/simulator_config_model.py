@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# U-Measure - A GUI software for ultrasonic data collection.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class SimulatorConfigModel:
+    """Dataclass that holds the timing, waveform and fault settings of the simulator."""
+
+    # Seconds spent on every command, per command header for the slower ones
+    latency: float = field(compare=False, default=0.001)
+    command_latency: dict[str, float] = field(
+        compare=False,
+        default_factory=lambda: {
+            "*idn": 0.01,
+            "curve": 0.02,
+            "horizontal:fastframe:timestamp:all:ch1": 0.01,
+        },
+    )
+
+    # Seconds per acquired waveform and per saved waveform file
+    acquisition_time: float = field(compare=False, default=0.05)
+    save_time: float = field(compare=False, default=0.2)
+
+    # Generated waveform, an excitation burst followed by attenuated echoes
+    record_length: int = field(compare=False, default=10000)
+    sample_interval: float = field(compare=False, default=4.0e-10)
+    echo_delay: float = field(compare=False, default=1.0e-6)
+    echo_attenuation: float = field(compare=False, default=0.4)
+    noise: float = field(compare=False, default=0.005)
+
+    # Probability of a fault per message, picked from the given fault kinds
+    fault_rate: float = field(compare=False, default=0.0)
+    faults: tuple[str, ...] = field(compare=False, default=("timeout",))
+    seed: int = field(compare=False, default=0)
+
+    def command_time(self, header: str) -> float:
+        """Returns the latency of the command with the given normalized header."""
+        return self.command_latency.get(header, self.latency)
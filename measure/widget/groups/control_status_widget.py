@@ -18,11 +18,14 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import datetime
 from pathlib import Path
+from typing import Optional
 from qtpy.QtWidgets import (
     QGroupBox,
     QGridLayout,
     QVBoxLayout,
+    QHBoxLayout,
     QSizePolicy,
     QLabel,
     QPushButton,
@@ -46,11 +49,28 @@ class ControlStatusWidget(QGroupBox):
         self._lbl_elapsed = QLabel("Elapsed time")
         self._lbl_feedback = QLabel("Feedback")
         self.lbl_repetition_status = QLabel()
+        self.lbl_writer_status = QLabel()
+        self.lbl_progress = QLabel()
+        self.lbl_settings_status = QLabel()
+        self._stage_labels: dict[str, tuple[QLabel, QLabel, QLabel]] = {
+            stage: (QLabel(name), QLabel("-"), QLabel("-"))
+            for stage, name in (
+                ("configure", "AFG"),
+                ("arm", "Arm"),
+                ("acquire", "Acq"),
+                ("save", "Save"),
+                ("settle", "Settle"),
+            )
+        }
+        self._stage_layout = QGridLayout()
         self.lbl_time = QLabel("0:00:00")
         self.lbl_status = QLabel("Idle")
         self.btn_collection = QPushButton("Collect")
+        self.btn_resume = QPushButton("Resume")
         self.txt_feedback = QPlainTextEdit()
         self.line_horizontal = QLine(vertical=False)
+        self._connection_labels: dict[str, QLabel] = {}
+        self._connection_layout = QHBoxLayout()
 
         # Run control group's widget methods
         self._configure_control_status_group()
@@ -80,6 +100,16 @@ class ControlStatusWidget(QGroupBox):
         self.lbl_status.setObjectName("lbl-status")
 
         self.lbl_repetition_status.setVisible(False)
+        self.lbl_writer_status.setObjectName("lbl-connection")
+        self.lbl_writer_status.setVisible(False)
+        self.lbl_progress.setObjectName("lbl-connection")
+        self.lbl_progress.setVisible(False)
+        self.lbl_settings_status.setObjectName("lbl-connection")
+        self.lbl_settings_status.setVisible(False)
+        for labels in self._stage_labels.values():
+            for label in labels:
+                label.setObjectName("lbl-stage")
+                label.setVisible(False)
 
     def _configure_control_status_buttons(self) -> None:
         """Configuration of the control group's buttons."""
@@ -88,6 +118,10 @@ class ControlStatusWidget(QGroupBox):
         self.btn_collection.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.btn_collection.setMinimumWidth(150)
 
+        self.btn_resume.setObjectName("btn-resume")
+        self.btn_resume.setFlat(True)
+        self.btn_resume.setVisible(False)
+
     def _configure_control_status_text_boxes(self) -> None:
         """Configuration of the control group's text boxes."""
         self.txt_feedback.setObjectName("txt-feedback")
@@ -95,6 +129,57 @@ class ControlStatusWidget(QGroupBox):
         self.txt_feedback.setMinimumHeight(100)
         self.txt_feedback.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
+    def set_connection_state(self, name: str, connected: bool, latency: float) -> None:
+        """Shows the connection state and round-trip latency of an instrument."""
+        label = self._connection_labels.get(name)
+        if label is None:
+            label = QLabel()
+            label.setObjectName("lbl-connection")
+            self._connection_labels[name] = label
+            self._connection_layout.addWidget(label, alignment=Qt.AlignCenter)
+
+        if connected:
+            label.setText(f"{name} {latency:.1f} ms")
+        else:
+            label.setText(f"{name} offline")
+        label.setEnabled(connected)
+
+    def set_writer_status(self, depth: int, latency: float) -> None:
+        """Shows the depth of the writer queue and the latency of the last write."""
+        self.lbl_writer_status.setText(f"Writer queue {depth}, {latency:.0f} ms")
+        self.lbl_writer_status.setVisible(True)
+
+    def set_progress(self, eta: Optional[float], throughput: float) -> None:
+        """Shows the remaining time and the acquisitions per minute of a collection."""
+        if eta is None:
+            remaining = "ETA unknown"
+        else:
+            remaining = f"ETA {datetime.timedelta(seconds=round(eta))}"
+        self.lbl_progress.setText(f"{remaining}, {throughput:.1f} acq/min")
+
+    def set_stage_timing(
+        self, last: dict[str, float], averages: dict[str, float], slow: set[str]
+    ) -> None:
+        """Shows the stage durations of the last step and their rolling averages in ms.
+
+        Stages that were slow compared to their average are highlighted.
+        """
+        for stage, (name, last_label, average_label) in self._stage_labels.items():
+            if stage not in last:
+                continue
+            last_label.setText(f"{last[stage] * 1000.0:.0f}")
+            average_label.setText(f"{averages[stage] * 1000.0:.0f}")
+            for label in (name, last_label, average_label):
+                label.setEnabled(stage not in slow)
+                label.setVisible(True)
+
+    def set_settings_status(self, writes: int, flushes: int, pending: int) -> None:
+        """Shows the settings storage writes, used as a debug overlay."""
+        self.lbl_settings_status.setText(
+            f"Settings {writes} writes in {flushes} flushes, {pending} pending"
+        )
+        self.lbl_settings_status.setVisible(True)
+
     def _layout_control_status_widgets(self) -> None:
         """Sets the layout for the control status group widgets."""
         # Main control status layout
@@ -114,6 +199,16 @@ class ControlStatusWidget(QGroupBox):
         elapsed_layout.setContentsMargins(0, 0, 0, 0)
         elapsed_layout.addWidget(self._lbl_elapsed, alignment=Qt.AlignCenter)
         elapsed_layout.addWidget(self.lbl_time, alignment=Qt.AlignCenter)
+        elapsed_layout.addWidget(self.lbl_progress, alignment=Qt.AlignCenter)
+
+        # layout for the stage breakdown, last step above the rolling average
+        self._stage_layout.setContentsMargins(0, 0, 0, 0)
+        self._stage_layout.setHorizontalSpacing(6)
+        self._stage_layout.setVerticalSpacing(0)
+        for column, labels in enumerate(self._stage_labels.values()):
+            for row, label in enumerate(labels):
+                self._stage_layout.addWidget(label, row, column, Qt.AlignCenter)
+        elapsed_layout.addLayout(self._stage_layout)
 
         # layout for status and collection
         collection_layout = QVBoxLayout()
@@ -123,10 +218,15 @@ class ControlStatusWidget(QGroupBox):
             self.lbl_repetition_status, alignment=Qt.AlignCenter
         )
         collection_layout.addWidget(self.btn_collection)
+        collection_layout.addWidget(self.btn_resume)
 
         # layout for the complete control part
         control_layout = QVBoxLayout()
         control_layout.addStretch(1)
+        self._connection_layout.setContentsMargins(0, 0, 0, 0)
+        control_layout.addLayout(self._connection_layout)
+        control_layout.addWidget(self.lbl_writer_status, alignment=Qt.AlignCenter)
+        control_layout.addWidget(self.lbl_settings_status, alignment=Qt.AlignCenter)
         control_layout.addLayout(elapsed_layout)
         control_layout.addLayout(collection_layout)
         control_status_layout.addLayout(control_layout, 0, 1, 1, 1)
@@ -26,6 +26,7 @@ from qtpy.QtWidgets import (
     QLabel,
     QLineEdit,
     QSpinBox,
+    QComboBox,
     QDoubleSpinBox,
     QAbstractSpinBox,
 )
@@ -52,6 +53,8 @@ class ExperimentWidget(QGroupBox):
         self._lbl_file_number = QLabel("#File")
         self._lbl_load = QLabel("Load (tons)")
         self._lbl_temperature = QLabel("Temperature (K)")
+        self._lbl_storage = QLabel("Storage")
+        self._lbl_acquisition = QLabel("Acquisition")
         self.txt_frequencies = QLineEdit()
         self.txt_threshold = QLineEdit()
         self.txt_reset = QLineEdit()
@@ -60,6 +63,8 @@ class ExperimentWidget(QGroupBox):
         self.spin_file_number = QSpinBox()
         self.spin_load = QDoubleSpinBox()
         self.spin_temperature = QDoubleSpinBox()
+        self.combo_storage = QComboBox()
+        self.combo_acquisition = QComboBox()
 
         # List of experiment group's widgets
         self._experiment_widgets = [
@@ -71,6 +76,8 @@ class ExperimentWidget(QGroupBox):
             self._lbl_file_number,
             self._lbl_load,
             self._lbl_temperature,
+            self._lbl_storage,
+            self._lbl_acquisition,
             self.txt_frequencies,
             self.txt_threshold,
             self.txt_reset,
@@ -79,6 +86,8 @@ class ExperimentWidget(QGroupBox):
             self.spin_file_number,
             self.spin_load,
             self.spin_temperature,
+            self.combo_storage,
+            self.combo_acquisition,
         ]
 
         # Run experiment group's widget methods
@@ -86,6 +95,7 @@ class ExperimentWidget(QGroupBox):
         self._configure_experiment_labels()
         self._configure_experiment_text_boxes()
         self._configure_experiment_spin_boxes()
+        self._configure_experiment_combo_boxes()
         self._layout_experiment_widgets()
 
     def disable(self) -> None:
@@ -96,6 +106,10 @@ class ExperimentWidget(QGroupBox):
         """Enables all experiment group's widgets."""
         [widget.setEnabled(True) for widget in self._experiment_widgets]
 
+    def set_repetitions_label(self, text: str) -> None:
+        """Changes the repetitions label, the spin box is reused by some modes."""
+        self._lbl_repetitions.setText(text)
+
     def _configure_experiment_group(self) -> None:
         """Configuration of the experiment groupbox."""
         # Set group object name
@@ -115,6 +129,8 @@ class ExperimentWidget(QGroupBox):
             self._lbl_file_number,
             self._lbl_load,
             self._lbl_temperature,
+            self._lbl_storage,
+            self._lbl_acquisition,
         ]
         [label.setObjectName("lbl-experiment") for label in labels]
 
@@ -176,6 +192,18 @@ class ExperimentWidget(QGroupBox):
         self.spin_temperature.setSingleStep(100.0)
         self.spin_temperature.setDecimals(1)
 
+    def _configure_experiment_combo_boxes(self) -> None:
+        """Configuration of the experiment group's combo boxes."""
+        self.combo_storage.setObjectName("combo-experiment")
+        self.combo_storage.addItem("Scope CSV", "scope")
+        self.combo_storage.addItem("Host CSV", "csv")
+        self.combo_storage.addItem("Host HDF5", "hdf5")
+
+        self.combo_acquisition.setObjectName("combo-experiment")
+        self.combo_acquisition.addItem("Standard", "standard")
+        self.combo_acquisition.addItem("FastFrame", "fastframe")
+        self.combo_acquisition.addItem("Average", "average")
+
     def _layout_experiment_widgets(self) -> None:
         """Sets the layout for the experiment group widgets."""
         # Main experiment layout
@@ -209,4 +237,14 @@ class ExperimentWidget(QGroupBox):
         load_temperature_layout.addWidget(self.txt_scan)
         experiment_layout.addLayout(load_temperature_layout, 1, 0, 1, 6)
 
+        # layout for acquisition and storage modes
+        modes_layout = QHBoxLayout()
+        modes_layout.setContentsMargins(0, 0, 0, 0)
+        modes_layout.addWidget(self._lbl_acquisition)
+        modes_layout.addWidget(self.combo_acquisition)
+        modes_layout.addWidget(self._lbl_storage)
+        modes_layout.addWidget(self.combo_storage)
+        modes_layout.addStretch(1)
+        experiment_layout.addLayout(modes_layout, 2, 0, 1, 6)
+
         self.setLayout(experiment_layout)